@@ -9,4 +9,4 @@ class AudioExperimentData(models.Model):
     minima_detected = models.IntegerField(default=0)
 
     def __str__(self):
-        return f"Аудиоданные для эксперимента #{self.experiment.id}"
\ No newline at end of file
+        return f"Аудиоданные для эксперимента #{self.experiment_id}"
\ No newline at end of file
@@ -35,6 +35,7 @@ class CalculationsInline(admin.TabularInline):
     extra = 0
     fields = ('step_number', 'description', 'formula_used', 'input_data', 'output_data', 'timestamp')
     readonly_fields = ('timestamp',)
+    ordering = ('step_number',)
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -124,6 +125,7 @@ class ExperimentsAdmin(admin.ModelAdmin):
         'error_percent_final_gamma',
     )
     list_filter = ('status', 'user', 'assistant', 'created_at')
+    list_select_related = ('user', 'assistant')
     search_fields = ('id', 'user__full_name', 'user__email', 'assistant__full_name')
     readonly_fields = (
         'created_at', 
@@ -172,6 +174,8 @@ class ExperimentsAdmin(admin.ModelAdmin):
 class EquipmentDataAdmin(admin.ModelAdmin):
     list_display = ('id', 'experiment', 'time_ms', 'microphone_signal', 'tube_position', 'voltage')
     list_filter = ('experiment',)
+    # __str__ эксперимента выводит ФИО студента - подгружаем одним JOIN
+    list_select_related = ('experiment__user',)
     search_fields = ('experiment__id',)
     list_per_page = 20
 
@@ -183,6 +187,7 @@ class ResultsAdmin(admin.ModelAdmin):
         'status'
     )
     list_filter = ('status',)
+    list_select_related = ('experiment__user',)
     search_fields = ('experiment__id',)
     readonly_fields = (
         'experiment', 
@@ -195,5 +200,7 @@ class ResultsAdmin(admin.ModelAdmin):
 class CalculationsAdmin(admin.ModelAdmin):
     list_display = ('id', 'experiment', 'step_number', 'timestamp')
     list_filter = ('experiment', 'step_number')
+    list_select_related = ('experiment__user',)
     search_fields = ('experiment__id', 'description')
-    date_hierarchy = 'timestamp'
\ No newline at end of file
+    date_hierarchy = 'timestamp'
+    ordering = ('experiment', 'step_number')
\ No newline at end of file
@@ -8,19 +8,37 @@ ser = serial.Serial(
     timeout=1
 )
 
+# Буфер для накопления байтов между чтениями (хвост незавершенной строки)
+buffer = bytearray()
+
 try:
     print("Чтение данных с датчика HC-SR04... (Ctrl+C для остановки)")
     while True:
-        if ser.in_waiting > 0:
-            # Чтение строки из последовательного порта
-            line = ser.readline().decode('utf-8').rstrip()
-            
+        # Читаем все накопленные байты одним блоком; если порт пуст -
+        # блокируемся до таймаута в ожидании хотя бы одного байта
+        chunk = ser.read(ser.in_waiting or 1)
+        if not chunk:
+            continue
+        buffer += chunk
+
+        end = buffer.rfind(b'\n')
+        if end < 0:
+            continue
+
+        for raw_line in buffer[:end].split(b'\n'):
+            line = raw_line.strip()
+            if not line:
+                continue
             try:
+                # float() принимает bytes напрямую, без промежуточного decode
                 distance = float(line)
                 print(f"Расстояние: {distance:.2f} см") # частота 10 гц
             except ValueError:
-                print(f"Получены некорректные данные: {line}")
+                print(f"Получены некорректные данные: {line.decode('utf-8', errors='replace')}")
+
+        # Оставляем в буфере только незавершенный хвост
+        del buffer[:end + 1]
 
 except KeyboardInterrupt:
     print("\nПрограмма остановлена")
-    ser.close()  # Закрытие последовательного порта
\ No newline at end of file
+    ser.close()  # Закрытие последовательного порта
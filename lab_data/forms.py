@@ -4,6 +4,9 @@ from django.contrib.auth.forms import AuthenticationForm
 from .models import User
 from django.contrib.auth import authenticate
 
+# Поля, достаточные для проверки пароля, входа и логирования в представлениях
+LOGIN_FIELDS = ('id', 'password', 'is_active', 'role', 'email', 'full_name')
+
 class StudentLoginForm(AuthenticationForm):
     full_name = forms.CharField(label="ФИО", max_length=100)
     group_name = forms.CharField(label="Группа", max_length=20)
@@ -21,7 +24,9 @@ class StudentLoginForm(AuthenticationForm):
         if full_name and group_name and password:
             # Ищем пользователя по ФИО и группе
             try:
-                user = User.objects.get(full_name=full_name, group_name=group_name, role='student')
+                user = User.objects.only(*LOGIN_FIELDS).get(
+                    full_name=full_name, group_name=group_name, role='student'
+                )
                 if user.check_password(password):
                     self.user_cache = user
                 else:
@@ -41,7 +46,7 @@ class TeacherLoginForm(AuthenticationForm):
 
         if email and password:
             try:
-                user = User.objects.get(email=email, role='teacher')
+                user = User.objects.only(*LOGIN_FIELDS).get(email=email, role='teacher')
                 if user.check_password(password):
                     self.user_cache = user
                 else:
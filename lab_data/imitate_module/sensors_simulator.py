@@ -1,12 +1,16 @@
 import numpy as np
-import scipy.signal as signal
-import matplotlib.pyplot as plt
-import random
+from scipy.signal import savgol_coeffs, find_peaks
 import math
 import json
+import sys
 from datetime import datetime
 import logging
 
+try:
+    from numba import njit
+except ImportError:  # numba не установлена - используются реализации на NumPy
+    njit = None
+
 # Настройка логгера
 logging.basicConfig(
     level=logging.INFO,
@@ -15,6 +19,141 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Физические константы воздуха
+GAMMA_AIR = 1.4
+R_SPECIFIC = 287.05  # Удельная газовая постоянная (Дж/(кг·К))
+MOLAR_MASS_AIR = 0.029  # Молярная масса воздуха (кг/моль)
+R_UNIVERSAL = 8.314  # Универсальная газовая постоянная
+
+# Количество отсчетов, снимаемых на одной частоте
+STEPS_PER_FREQUENCY = 2000
+# Длина трубки (ход), мм
+TUBE_LENGTH_MM = 1000
+# Период опроса датчиков, мс
+SAMPLE_PERIOD_MS = 5
+# Столбцы сырых данных датчиков
+SENSOR_COLUMNS = ('time_ms', 'microphone_signal', 'tube_position', 'voltage', 'frequency')
+
+# Параметры сглаживания Савицкого-Голея
+SG_WINDOW_LENGTH = 51
+SG_POLYORDER = 3
+
+# Коэффициенты фильтра считаются один раз при импорте модуля:
+# центральные - для внутренних точек, краевые - для первых и последних
+# SG_WINDOW_LENGTH // 2 точек (как в режиме mode='interp' у savgol_filter)
+_SG_HALF = SG_WINDOW_LENGTH // 2
+SG_COEFFS = savgol_coeffs(SG_WINDOW_LENGTH, SG_POLYORDER, use='dot')
+SG_EDGE_LEFT = np.array([
+    savgol_coeffs(SG_WINDOW_LENGTH, SG_POLYORDER, pos=i, use='dot')
+    for i in range(_SG_HALF)
+])
+SG_EDGE_RIGHT = np.array([
+    savgol_coeffs(SG_WINDOW_LENGTH, SG_POLYORDER, pos=_SG_HALF + 1 + i, use='dot')
+    for i in range(_SG_HALF)
+])
+
+# Биномиальное ядро 4-го порядка, примененное дважды (9 отсчетов)
+BINOMIAL_KERNEL = np.convolve([1, 4, 6, 4, 1], [1, 4, 6, 4, 1]) / 256.0
+
+# Параметры поиска минимумов: минимальное расстояние между ними в отсчетах
+# и минимальная глубина провала относительно окрестности
+MINIMA_DISTANCE = 20
+MINIMA_MIN_DROP = 10.0
+
+
+def _savgol_smooth(signal_array, coeffs, edge_left, edge_right):
+    """
+    Сглаживание Савицкого-Голея с заранее вычисленными коэффициентами.
+
+    Эквивалентно savgol_filter(..., mode='interp'); при наличии numba
+    компилируется в машинный код.
+
+    Args:
+        signal_array: Сигнал (длина не меньше окна фильтра)
+        coeffs: Коэффициенты для внутренних точек
+        edge_left: Коэффициенты для левого края, форма (half, window)
+        edge_right: Коэффициенты для правого края, форма (half, window)
+
+    Returns:
+        np.ndarray: Сглаженный сигнал
+    """
+    n = signal_array.shape[0]
+    window = coeffs.shape[0]
+    half = window // 2
+    smoothed = np.empty(n)
+
+    for i in range(half, n - half):
+        acc = 0.0
+        for k in range(window):
+            acc += coeffs[k] * signal_array[i - half + k]
+        smoothed[i] = acc
+
+    for i in range(half):
+        acc_left = 0.0
+        acc_right = 0.0
+        for k in range(window):
+            acc_left += edge_left[i, k] * signal_array[k]
+            acc_right += edge_right[i, k] * signal_array[n - window + k]
+        smoothed[i] = acc_left
+        smoothed[n - half + i] = acc_right
+
+    return smoothed
+
+
+if njit is not None:
+    _savgol_smooth = njit(cache=True, nogil=True, fastmath=True)(_savgol_smooth)
+
+
+def _savgol_smooth_numpy(signal_array: np.ndarray) -> np.ndarray:
+    """
+    Сглаживание Савицкого-Голея через np.convolve с готовыми коэффициентами.
+
+    Используется без numba; результат совпадает с savgol_filter(..., mode='interp'),
+    но матрица фильтра не перестраивается на каждый вызов.
+
+    Args:
+        signal_array: Сигнал (длина не меньше окна фильтра)
+
+    Returns:
+        np.ndarray: Сглаженный сигнал
+    """
+    smoothed = np.convolve(signal_array, SG_COEFFS[::-1], mode='same')
+    smoothed[:_SG_HALF] = SG_EDGE_LEFT @ signal_array[:SG_WINDOW_LENGTH]
+    smoothed[-_SG_HALF:] = SG_EDGE_RIGHT @ signal_array[-SG_WINDOW_LENGTH:]
+    return smoothed
+
+
+def _binomial_smooth(signal_array: np.ndarray) -> np.ndarray:
+    """
+    Дешевое биномиальное сглаживание (края дополняются крайними значениями).
+
+    Args:
+        signal_array: Сигнал
+
+    Returns:
+        np.ndarray: Сглаженный сигнал той же длины
+    """
+    pad = len(BINOMIAL_KERNEL) // 2
+    padded = np.pad(signal_array, pad, mode='edge')
+    return np.convolve(padded, BINOMIAL_KERNEL, mode='valid')
+
+
+def _dumps(obj: dict) -> str:
+    """
+    Сериализует результаты эксперимента в JSON.
+
+    Формат тот же, что у сохраненных ранее результатов (indent=2),
+    независимо от установленных библиотек; массивы и скаляры NumPy
+    приводятся к типам Python.
+
+    Args:
+        obj: Сериализуемый объект
+
+    Returns:
+        str: JSON-строка
+    """
+    return json.dumps(obj, indent=2, default=lambda value: value.tolist())
+
 
 class ExperimentSimulator:
     """
@@ -30,16 +169,37 @@ class ExperimentSimulator:
         initial_speed (float): Базовая скорость движения трубки в мм/с
     """
 
-    def __init__(self):
-        """Инициализация параметров эксперимента со случайными флуктуациями."""
-        self.temperature = 20.0 + random.uniform(-2, 3)
+    def __init__(self, seed: int | None = None):
+        """
+        Инициализация параметров эксперимента со случайными флуктуациями.
+
+        Args:
+            seed: Зерно генератора случайных чисел (для воспроизводимости)
+        """
+        self._rng = np.random.default_rng(seed)
+        self.temperature = 20.0 + self._rng.uniform(-2, 3)
         self.temperature_drift = 3.0
         self.mic_noise = 15
         self.position = 0
         self.frequency_range = (1500, 5500)
         self.initial_speed = 1.5
+        # Рабочий буфер для шума микрофона, переиспользуется между частотами
+        self._noise_buf = np.empty(STEPS_PER_FREQUENCY)
+        self._update_thermal_constants()
         logger.info("Инициализирован новый симулятор эксперимента")
 
+    def _update_thermal_constants(self) -> None:
+        """
+        Пересчитывает зависящие от температуры константы.
+
+        Вызывается при каждом изменении self.temperature: скорость звука
+        и множитель M/(R·T) для расчета γ считаются один раз, а не на каждом
+        шаге моделирования.
+        """
+        temperature_kelvin = self.temperature + 273.15
+        self._v_sound = math.sqrt(GAMMA_AIR * R_SPECIFIC * temperature_kelvin)
+        self._gamma_k = MOLAR_MASS_AIR / (R_UNIVERSAL * temperature_kelvin)
+
     def generate_temperature(self) -> float:
         """
         Генерирует температуру с синусоидальным дрейфом и шумом.
@@ -47,102 +207,131 @@ class ExperimentSimulator:
         Returns:
             float: Обновленная температура в °C
         """
-        drift = 0.1 * np.sin(2 * np.pi * np.random.uniform(0, 1))
-        noise = random.uniform(-0.5, 0.5)
+        drift = 0.1 * math.sin(2 * math.pi * self._rng.random())
+        noise = self._rng.uniform(-0.5, 0.5)
         self.temperature += drift + noise
-        logger.debug(f"Новая температура: {self.temperature:.2f}°C")
+        self._update_thermal_constants()
+        logger.debug("Новая температура: %.2f°C", self.temperature)
         return self.temperature
 
-    def generate_voltage(self) -> float:
+    def generate_voltages(self, n_steps: int) -> np.ndarray:
         """
-        Генерирует напряжение с небольшим случайным шумом.
-        
+        Генерирует напряжения для n_steps отсчетов одним вызовом генератора.
+
+        Args:
+            n_steps: Количество отсчетов
+
         Returns:
-            float: Значение напряжения в В
+            np.ndarray: Значения напряжения в В
         """
-        voltage = 5.0 + random.uniform(-0.2, 0.2)
-        logger.debug(f"Сгенерировано напряжение: {voltage:.2f} В")
-        return voltage
+        return 5.0 + self._rng.uniform(-0.2, 0.2, n_steps)
 
-    def generate_microphone_signal(
-        self,
-        frequency: float,
-        position: float,
-        temperature: float
-    ) -> float:
+    def generate_positions(self, n_steps: int) -> np.ndarray:
         """
-        Моделирует сигнал микрофона с учетом интерференции и шума.
-        
+        Векторно генерирует траекторию трубки из n_steps шагов.
+
+        Позиция накапливается со скоростью initial_speed ± 0.1 мм за шаг,
+        ограничивается концом трубки (TUBE_LENGTH_MM), а на следующем шаге
+        после достижения конца сбрасывается в 0.
+
         Args:
-            frequency: Частота звука в Гц
-            position: Позиция трубки в мм
-            temperature: Текущая температура в °C
-            
+            n_steps: Количество шагов
+
         Returns:
-            float: Значение сигнала микрофона в усл. ед.
+            np.ndarray: Позиции трубки в мм
         """
-        delta_L = 2 * position / 1000  # Разность хода волн в метрах
-        temperature_kelvin = temperature + 273.15
-        
-        # Параметры воздуха
-        gamma = 1.4
-        R = 287.05  # Удельная газовая постоянная (Дж/(кг·К))
-        
-        # Расчет скорости звука и длины волны
-        v_sound = (gamma * R * temperature_kelvin) ** 0.5
-        wavelength = v_sound / frequency
-        
-        # Моделирование сигнала с шумом
-        signal_value = 600 * (1 + np.cos(2 * np.pi * delta_L / wavelength))
-        signal_value += random.gauss(0, self.mic_noise)
-        
-        # Ограничение диапазона
-        return np.clip(signal_value, 50, 950)
+        speeds = self.initial_speed + self._rng.uniform(-0.1, 0.1, n_steps)
+        positions = np.empty(n_steps)
+        start = 0
+        while start < n_steps:
+            segment = np.cumsum(speeds[start:])
+            # Первый шаг, на котором трубка дошла до конца; после него сброс
+            length = min(
+                int(np.searchsorted(segment, TUBE_LENGTH_MM)) + 1,
+                n_steps - start
+            )
+            positions[start:start + length] = segment[:length]
+            start += length
+        np.minimum(positions, TUBE_LENGTH_MM, out=positions)
+        self.position = float(positions[-1])
+        return positions
 
-    def generate_position(self) -> float:
+    def generate_microphone_signals(
+        self,
+        positions: np.ndarray,
+        wavelength: float
+    ) -> np.ndarray:
         """
-        Обновляет позицию трубки с учетом скорости и случайного шума.
-        
+        Векторно моделирует сигнал микрофона для массива позиций.
+
+        Длина волны постоянна в пределах одной частоты, поэтому считается
+        вызывающим кодом один раз и передается сюда готовой.
+
+        Args:
+            positions: Позиции трубки в мм
+            wavelength: Длина волны в м
+
         Returns:
-            float: Новая позиция трубки в мм
+            np.ndarray: Значения сигнала микрофона в усл. ед.
         """
-        if self.position >= 1000:
-            self.position = 0  # Сброс позиции
-            logger.debug("Позиция трубки сброшена в 0")
-            
-        speed = self.initial_speed + random.uniform(-0.1, 0.1)
-        self.position = min(self.position + speed, 1000)
-        return self.position
+        # Разность хода 2 * pos / 1000 м и множитель 2π/λ свернуты
+        # в одно волновое число на миллиметр позиции
+        k = 4 * math.pi / (1000.0 * wavelength)
+        # Результат сохраняется вызывающим кодом, поэтому выделяется заново;
+        # все промежуточные шаги выполняются на месте без временных массивов
+        signal_values = np.multiply(positions, k)
+        np.cos(signal_values, out=signal_values)
+        signal_values *= 600
+        signal_values += 600
+
+        n_steps = len(positions)
+        if self._noise_buf.shape[0] != n_steps:
+            self._noise_buf = np.empty(n_steps)
+        noise = self._rng.standard_normal(out=self._noise_buf)
+        noise *= self.mic_noise
+        signal_values += noise
+
+        np.clip(signal_values, 50, 950, out=signal_values)
+        return signal_values
 
     def find_interference_minima(
         self,
-        signal_data: list
+        signal_data: np.ndarray | list,
+        use_binomial: bool = False
     ) -> tuple[np.ndarray, np.ndarray] | tuple[None, None]:
         """
         Находит минимумы интерференционной картины.
         
         Args:
-            signal_data: Список значений сигнала
+            signal_data: Значения сигнала; массив float64 используется без копирования
+            use_binomial: Сглаживать биномиальным фильтром вместо
+                фильтра Савицкого-Голея
             
         Returns:
             tuple: (Сглаженный сигнал, индексы минимумов) или (None, None)
         """
-        signal_array = np.array(signal_data)
-        
-        # Параметры сглаживания
-        window_length = 51
-        polyorder = 3
+        signal_array = np.asarray(signal_data, dtype=np.float64)
         
         try:
-            smoothed_signal = signal.savgol_filter(
-                signal_array,
-                window_length,
-                polyorder
-            )
-            peaks, _ = signal.find_peaks(
+            if use_binomial:
+                smoothed_signal = _binomial_smooth(signal_array)
+            elif len(signal_array) < SG_WINDOW_LENGTH:
+                raise ValueError("Сигнал короче окна сглаживания")
+            elif njit is not None:
+                smoothed_signal = _savgol_smooth(
+                    signal_array,
+                    SG_COEFFS,
+                    SG_EDGE_LEFT,
+                    SG_EDGE_RIGHT
+                )
+            else:
+                smoothed_signal = _savgol_smooth_numpy(signal_array)
+            # Минимумы ищет find_peaks при любом сглаживании: результат
+            # (а значит, скорость звука и γ) не зависит от наличия numba
+            peaks, _ = find_peaks(
                 -smoothed_signal,
-                prominence=10,
-                distance=20
+                prominence=MINIMA_MIN_DROP,
+                distance=MINIMA_DISTANCE
             )
             
             if len(peaks) >= 2:
@@ -172,27 +361,21 @@ class ExperimentSimulator:
         Returns:
             tuple: (γ, скорость звука в м/с, длина волны в м)
         """
-        delta_L = 2 * position / 1000
-        temperature_kelvin = temperature + 273.15
-        
-        # Физические константы
-        gamma = 1.4
-        R = 287.05  # Удельная газовая постоянная (Дж/(кг·К))
-        molar_mass = 0.029  # Молярная масса воздуха (кг/моль)
-        universal_gas_constant = 8.314  # Универсальная газовая постоянная
-        
-        # Расчет параметров
-        v_sound = (gamma * R * temperature_kelvin) ** 0.5
+        # Расчет параметров (при текущей температуре - из кэша)
+        if temperature == self.temperature:
+            v_sound = self._v_sound
+            gamma_k = self._gamma_k
+        else:
+            temperature_kelvin = temperature + 273.15
+            v_sound = math.sqrt(GAMMA_AIR * R_SPECIFIC * temperature_kelvin)
+            gamma_k = MOLAR_MASS_AIR / (R_UNIVERSAL * temperature_kelvin)
         wavelength = v_sound / frequency
         
         # Расчет γ с небольшим случайным отклонением
-        gamma_value = (
-            (v_sound ** 2 * molar_mass) /
-            (universal_gas_constant * temperature_kelvin)
-        ) * random.uniform(0.998, 1.002)
+        gamma_value = v_sound ** 2 * gamma_k * self._rng.uniform(0.998, 1.002)
         
         logger.debug(
-            f"Рассчитано γ={gamma_value:.3f} для частоты {frequency} Гц"
+            "Рассчитано γ=%.3f для частоты %s Гц", gamma_value, frequency
         )
         return gamma_value, v_sound, wavelength
 
@@ -206,22 +389,82 @@ class ExperimentSimulator:
         Returns:
             list: Список частот в Гц
         """
-        frequencies = [
-            round(random.uniform(*self.frequency_range), 2)
-            for _ in range(n)
-        ]
-        logger.info(f"Сгенерированы частоты: {frequencies} Гц")
+        frequencies = np.round(
+            self._rng.uniform(*self.frequency_range, size=n), 2
+        ).tolist()
+        logger.info("Сгенерированы частоты: %s Гц", frequencies)
         return frequencies
 
+    def _run_frequency(self, freq: float) -> tuple[dict, dict]:
+        """
+        Моделирует измерение на одной частоте при текущей температуре.
+        
+        Args:
+            freq: Частота в Гц
+            
+        Returns:
+            tuple: (результат по частоте, столбцы сырых данных датчиков)
+        """
+        self.position = 0  # Сброс позиции для каждого эксперимента
+        logger.debug("Обработка частоты %s Гц", freq)
+
+        # Скорость звука и длина волны не меняются в пределах частоты
+        wavelength = self._v_sound / freq
+
+        positions = self.generate_positions(STEPS_PER_FREQUENCY)
+        signal_data = self.generate_microphone_signals(positions, wavelength)
+        voltages = self.generate_voltages(STEPS_PER_FREQUENCY)
+
+        columns = {
+            'time_ms': np.arange(STEPS_PER_FREQUENCY) * SAMPLE_PERIOD_MS,
+            'microphone_signal': signal_data,
+            'tube_position': positions,
+            'voltage': voltages,
+            'frequency': np.full(STEPS_PER_FREQUENCY, freq)
+        }
+
+        smoothed_signal, peaks = self.find_interference_minima(signal_data)
+
+        if smoothed_signal is None or peaks is None:
+            logger.warning(
+                "Не удалось обработать частоту %s Гц: недостаточно минимумов",
+                freq
+            )
+            return {
+                'frequency': freq,
+                'status': 'fail',
+                'reason': 'Not enough minima found.'
+            }, columns
+
+        gamma_value, v_sound, wavelength = self.calculate_gamma(
+            freq,
+            self.position,
+            self.temperature
+        )
+        logger.info(
+            "Успешно обработана частота %s Гц: γ=%.3f, v=%.1f м/с",
+            freq, gamma_value, v_sound
+        )
+        return {
+            'frequency': freq,
+            'status': 'success',
+            'gamma': gamma_value,
+            'speed_sound': v_sound,
+            'wavelength': wavelength
+        }, columns
+
     def run_experiment(
         self,
-        frequencies: list[float] | None = None
+        frequencies: list[float] | None = None,
+        include_raw_sensor_data: bool = False
     ) -> str:
         """
         Проводит эксперимент и возвращает результаты в формате JSON.
         
         Args:
             frequencies: Список частот в Гц (опционально)
+            include_raw_sensor_data: Включить в результат сырые данные
+                датчиков; по умолчанию возвращается только число отсчетов
             
         Returns:
             str: JSON-строка с результатами эксперимента
@@ -233,79 +476,36 @@ class ExperimentSimulator:
             frequencies = self.generate_random_frequencies()
             logger.info("Использованы случайные частоты")
 
-        results = []
-        sensor_data = []
         timestamp = datetime.now().isoformat()
         logger.info(f"Начало эксперимента в {timestamp}")
 
+        runs = []
         for freq in frequencies:
             self.generate_temperature()
-            signal_data = []
-            self.position = 0  # Сброс позиции для каждого эксперимента
-            logger.debug(f"Обработка частоты {freq} Гц")
-
-            for step in range(2000):
-                current_pos = self.generate_position()
-                mic_signal = self.generate_microphone_signal(
-                    freq,
-                    current_pos,
-                    self.temperature
-                )
-                voltage = self.generate_voltage()
-
-                signal_data.append(mic_signal)
-                
-                sensor_data.append({
-                    'time_ms': step * 5,
-                    'microphone_signal': mic_signal,
-                    'tube_position': current_pos,
-                    'voltage': voltage,
-                    'frequency': freq
-                })
-
-            smoothed_signal, peaks = self.find_interference_minima(signal_data)
-
-            if smoothed_signal is None or peaks is None:
-                result = {
-                    'frequency': freq,
-                    'status': 'fail',
-                    'reason': 'Not enough minima found.'
-                }
-                results.append(result)
-                logger.warning(
-                    f"Не удалось обработать частоту {freq} Гц: "
-                    "недостаточно минимумов"
-                )
-                continue
+            runs.append(self._run_frequency(freq))
 
-            gamma_value, v_sound, wavelength = self.calculate_gamma(
-                freq,
-                self.position,
-                self.temperature
-            )
+        results = []
+        # Сырые данные датчиков хранятся по столбцам: на каждой частоте
+        # в список столбца добавляется целый массив, а не 2000 словарей
+        sensor_chunks = {name: [] for name in SENSOR_COLUMNS}
+        # Среднее γ накапливается в том же проходе по результатам
+        gamma_total = 0.0
+        success_count = 0
 
-            result = {
-                'frequency': freq,
-                'status': 'success',
-                'gamma': gamma_value,
-                'speed_sound': v_sound,
-                "sensor_data": sensor_data,
-                'wavelength': wavelength,
-                'timestamp': timestamp
-            }
+        for result, columns in runs:
+            for name in SENSOR_COLUMNS:
+                sensor_chunks[name].append(columns[name])
+            if result['status'] == 'success':
+                result['timestamp'] = timestamp
+                gamma_total += result['gamma']
+                success_count += 1
             results.append(result)
-            logger.info(
-                f"Успешно обработана частота {freq} Гц: "
-                f"γ={gamma_value:.3f}, v={v_sound:.1f} м/с"
-            )
 
-        gamma_values = [r['gamma'] for r in results if r.get('status') == 'success']
-        
-        if not gamma_values:
+        if not success_count:
             logger.error("Не удалось получить ни одного успешного результата")
             raise ValueError("Эксперимент не дал успешных результатов")
             
-        gamma_calculated = np.mean(gamma_values)
+        gamma_calculated = gamma_total / success_count
         error_percent = abs(gamma_calculated - 1.4) / 1.4 * 100
         status = "success" if error_percent < 2.5 else "fail"
         
@@ -319,6 +519,16 @@ class ExperimentSimulator:
             "timestamp": timestamp
         }
 
+        # Сырые данные попадают в JSON один раз и только по запросу:
+        # сериализация тысяч отсчетов занимает больше времени, чем сам расчет
+        if include_raw_sensor_data:
+            output["sensor_data"] = {
+                name: np.concatenate(chunks)
+                for name, chunks in sensor_chunks.items()
+            }
+        else:
+            output["sensor_data_points"] = STEPS_PER_FREQUENCY * len(runs)
+
         logger.info(
             f"Эксперимент завершен: γ={gamma_calculated:.3f}, "
             f"отклонение={error_percent:.2f}%, статус={status}"
@@ -327,7 +537,7 @@ class ExperimentSimulator:
         # Вывод результатов в консоль
         self._print_results(output, results)
         
-        return json.dumps(output, indent=2)
+        return _dumps(output)
 
     def _print_results(self, output: dict, results: list) -> None:
         """
@@ -337,22 +547,28 @@ class ExperimentSimulator:
             output: Основные результаты
             results: Детальные результаты
         """
-        print(f"\n🔬 Результаты эксперимента #{output['timestamp']}")
-        print(f"🌡 Температура: {output['temperature']:.1f}°C")
-        print(f"📊 Гамма: {output['gamma_calculated']:.3f} "
-              f"(эталон {output['gamma_reference']})")
-        print(f"📉 Отклонение: {output['error_percent']:.2f}%")
-        print("\nДетализация по частотам:")
+        lines = [
+            f"\n🔬 Результаты эксперимента #{output['timestamp']}",
+            f"🌡 Температура: {output['temperature']:.1f}°C",
+            f"📊 Гамма: {output['gamma_calculated']:.3f} "
+            f"(эталон {output['gamma_reference']})",
+            f"📉 Отклонение: {output['error_percent']:.2f}%",
+            "\nДетализация по частотам:"
+        ]
         
         for result in results:
             if result.get('status') == 'success':
-                print(f"✅ {result['frequency']} Гц: "
-                      f"γ={result['gamma']:.3f} "
-                      f"λ={result['wavelength']:.3f} м "
-                      f"v={result['speed_sound']:.1f} м/с")
+                lines.append(f"✅ {result['frequency']} Гц: "
+                             f"γ={result['gamma']:.3f} "
+                             f"λ={result['wavelength']:.3f} м "
+                             f"v={result['speed_sound']:.1f} м/с")
             else:
-                print(f"❌ {result['frequency']} Гц: "
-                      f"{result.get('reason', 'Неудача')}")
+                lines.append(f"❌ {result['frequency']} Гц: "
+                             f"{result.get('reason', 'Неудача')}")
+
+        # Один вызов write вместо print на каждую строку
+        lines.append("")
+        sys.stdout.write("\n".join(lines))
 
 
 if __name__ == "__main__":
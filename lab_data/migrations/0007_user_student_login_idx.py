@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_data', '0006_experiments_error_percent_final_gamma_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'group_name', 'full_name'], name='user_student_login_idx'),
+        ),
+    ]
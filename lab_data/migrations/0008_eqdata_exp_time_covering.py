@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-16 10:00
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY не может выполняться внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('lab_data', '0007_user_student_login_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='equipmentdata',
+            index=models.Index(fields=['experiment', 'time_ms'], include=('microphone_signal', 'tube_position', 'voltage'), name='eqdata_exp_time_covering'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-16 10:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_data', '0008_eqdata_exp_time_covering'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='equipmentdata',
+            name='microphone_signal',
+            field=models.PositiveSmallIntegerField(validators=[django.core.validators.MaxValueValidator(1023)], verbose_name='Сигнал микрофона'),
+        ),
+    ]
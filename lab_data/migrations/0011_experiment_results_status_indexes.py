@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_data', '0010_microphone_signal_smallint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='results',
+            name='status',
+            field=models.CharField(choices=[('success', 'Успешно'), ('fail', 'Провальный'), ('pending_student_input', 'Ожидает ввода студента'), ('completed_by_assistant', 'Завершен лаборантом'), ('final_completed', 'Полностью завершен')], db_index=True, default='pending_student_input', max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='experiments',
+            index=models.Index(fields=['-created_at'], name='exp_created_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experiments',
+            index=models.Index(fields=['status', '-created_at'], name='exp_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experiments',
+            index=models.Index(condition=models.Q(('status__in', ['stage_1', 'stage_2', 'stage_3'])), fields=['created_at'], name='exp_active_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-16 10:00
+
+import lab_data.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_data', '0014_user_role_valid'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='calculations',
+            name='input_data',
+            field=models.JSONField(encoder=lab_data.models.OrjsonEncoder, verbose_name='Входные данные'),
+        ),
+        migrations.AlterField(
+            model_name='calculations',
+            name='output_data',
+            field=models.JSONField(encoder=lab_data.models.OrjsonEncoder, verbose_name='Выходные данные'),
+        ),
+        migrations.AlterField(
+            model_name='experiments',
+            name='stages',
+            field=models.JSONField(default=list, encoder=lab_data.models.OrjsonEncoder, help_text='Данные этапов: ["\n                 "{\'frequency\': 1500, \'data\': [...]}, "\n                 "{\'frequency\': 3000, \'data\': [...]}, ...]'),
+        ),
+        migrations.AlterField(
+            model_name='results',
+            name='detailed_results',
+            field=models.JSONField(default=list, encoder=lab_data.models.OrjsonEncoder),
+        ),
+        migrations.AlterField(
+            model_name='results',
+            name='visualization_data',
+            field=models.JSONField(default=dict, encoder=lab_data.models.OrjsonEncoder),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_data', '0018_jsonfield_orjson_encoder'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calculations',
+            index=models.Index(fields=['experiment', 'step_number'], name='calc_exp_step_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_data', '0019_calculations_exp_step_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='user',
+            options={'verbose_name': 'Пользователь', 'verbose_name_plural': 'Пользователи'},
+        ),
+        migrations.AlterModelOptions(
+            name='calculations',
+            options={'verbose_name': 'Расчёт', 'verbose_name_plural': 'Расчёты'},
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'full_name'], name='user_role_name_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-16 10:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_data', '0020_drop_default_ordering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experiments',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Дата обновления'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-16 10:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lab_data', '0021_experiments_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='experiments',
+            index=models.Index(fields=['user', '-created_at'], name='exp_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experiments',
+            index=models.Index(fields=['assistant', 'status'], name='exp_assistant_status_idx'),
+        ),
+        migrations.AlterField(
+            model_name='experiments',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='experiments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='experiments',
+            name='assistant',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assisted_experiments', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -1,5 +1,14 @@
-from django.db import models
-from django.core.validators import MinValueValidator, MaxValueValidator
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from operator import attrgetter
+
+from django.db import connection, models, transaction
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import MaxValueValidator
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -8,6 +17,41 @@ from django.contrib.auth.models import (
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+try:
+    import orjson
+except ImportError:  # orjson не установлена - используется стандартный json
+    orjson = None
+
+# Размер пакета COPY для отсчетов: на PostgreSQL пакеты крупнее
+# 1000 строк уже не ускоряют загрузку, а только растят буфер
+EQUIPMENT_BATCH_SIZE = 1000
+
+# Номера этапов эксперимента
+STAGE_NUMBERS = (1, 2, 3)
+
+# Размер пакета INSERT при массовом создании студентов
+STUDENTS_BATCH_SIZE = 500
+
+
+class OrjsonEncoder(DjangoJSONEncoder):
+    """
+    Кодировщик JSONField на базе orjson.
+
+    Большие массивы в stages и detailed_results кодируются в несколько раз
+    быстрее, а числа и массивы NumPy сериализуются без предварительного
+    приведения к типам Python. Без orjson работает как DjangoJSONEncoder.
+    """
+
+    def encode(self, obj) -> str:
+        if orjson is None:
+            return super().encode(obj)
+        return orjson.dumps(
+            obj,
+            default=self.default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ).decode()
+
+
 
 class UserManager(BaseUserManager):
     """
@@ -15,6 +59,27 @@ class UserManager(BaseUserManager):
     Реализует методы создания пользователей разных типов.
     """
 
+    def with_stats(self) -> models.QuerySet:
+        """
+        Пользователи со статистикой по завершенным экспериментам.
+
+        Агрегаты считаются одним запросом (на PostgreSQL - через FILTER),
+        без отдельного запроса на каждого студента.
+
+        Returns:
+            QuerySet: Пользователи с полями n_experiments, n_completed
+                и avg_err_gamma (среднее отклонение финальной γ, %)
+        """
+        completed = models.Q(experiments__status='completed')
+        return self.get_queryset().annotate(
+            n_experiments=models.Count('experiments'),
+            n_completed=models.Count('experiments', filter=completed),
+            avg_err_gamma=models.Avg(
+                'experiments__error_percent_final_gamma',
+                filter=completed
+            )
+        )
+
     def create_superuser(
         self,
         email: str,
@@ -94,24 +159,9 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault('is_staff', False)
         extra_fields.setdefault('role', 'student')
 
-        def create_assistant(
-            self,
-            email: str,
-            full_name: str,
-            password: str = None,
-            **extra_fields
-        ) -> 'User':
-            extra_fields.setdefault('is_staff', True)
-            extra_fields.setdefault('role', 'assistant')
-            return self._create_user(email, full_name, password, **extra_fields)
-        
         if 'email' not in extra_fields:
             # Генерация email если не предоставлен
-            email = (
-                f"{full_name.replace(' ', '.').lower()}."
-                f"{group_name.lower()}@example.com"
-            )
-            extra_fields['email'] = email
+            extra_fields['email'] = self._student_email(full_name, group_name)
             
         return self._create_user(
             extra_fields['email'],
@@ -121,6 +171,83 @@ class UserManager(BaseUserManager):
             **extra_fields
         )
 
+    def bulk_create_students(self, rows) -> list['User']:
+        """
+        Массово создает студентов пакетными INSERT.
+
+        Хэширование паролей - самая дорогая часть создания пользователя,
+        поэтому каждый различный пароль хэшируется один раз (обычно вся
+        группа получает общий начальный пароль), а сами хэши считаются
+        в пуле потоков (argon2 отпускает GIL на время вычисления хэша).
+
+        Args:
+            rows: Последовательность кортежей (full_name, group_name, password)
+
+        Returns:
+            list: Созданные студенты
+        """
+        rows = list(rows)
+        passwords = list(dict.fromkeys(row[2] for row in rows))
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            hashed = dict(zip(passwords, executor.map(make_password, passwords)))
+        password_hashes = [hashed[row[2]] for row in rows]
+
+        # _student_email уже дает адрес в нижнем регистре, поэтому
+        # normalize_email здесь ничего бы не изменил
+        users = [
+            self.model(
+                email=self._student_email(full_name, group_name),
+                full_name=full_name,
+                group_name=group_name,
+                role='student',
+                is_staff=False,
+                password=password_hash
+            )
+            for (full_name, group_name, _), password_hash
+            in zip(rows, password_hashes)
+        ]
+        return self.bulk_create(users, batch_size=STUDENTS_BATCH_SIZE)
+
+    @staticmethod
+    def _student_email(full_name: str, group_name: str) -> str:
+        """
+        Формирует email студента из ФИО и группы.
+
+        Args:
+            full_name: Полное имя студента
+            group_name: Название учебной группы
+
+        Returns:
+            str: Сгенерированный email
+        """
+        return (
+            f"{full_name.replace(' ', '.').lower()}."
+            f"{group_name.lower()}@example.com"
+        )
+
+    def create_assistant(
+        self,
+        email: str,
+        full_name: str,
+        password: str = None,
+        **extra_fields
+    ) -> 'User':
+        """
+        Создает пользователя с ролью лаборанта.
+
+        Args:
+            email: Email лаборанта
+            full_name: Полное имя лаборанта
+            password: Пароль (опционально)
+            **extra_fields: Дополнительные поля
+
+        Returns:
+            User: Созданный лаборант
+        """
+        extra_fields.setdefault('is_staff', True)
+        extra_fields.setdefault('role', 'assistant')
+        return self._create_user(email, full_name, password, **extra_fields)
+
     def _create_user(
         self,
         email: str,
@@ -160,19 +287,25 @@ class UserManager(BaseUserManager):
         return user
 
 
+class UserRole(models.TextChoices):
+    """Роли пользователя."""
+    STUDENT = 'student', 'Студент'
+    TEACHER = 'teacher', 'Преподаватель'
+    ASSISTANT = 'assistant', 'Лаборант'  # Новая роль
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     """
     Кастомная модель пользователя системы.
     Заменяет стандартную модель пользователя Django.
     """
 
-    # Выбор ролей пользователя
-    ROLE_CHOICES = [
-        ('student', 'Студент'),
-        ('teacher', 'Преподаватель'),
-        ('assistant', 'Лаборант'),  # Новая роль
+    # Вложенное имя для User.Role; сам класс объявлен на уровне модуля,
+    # чтобы Meta мог построить из него ограничение
+    Role = UserRole
 
-    ]
+    # Подписи ролей для role_display: поиск в словаре вместо обхода choices
+    _ROLE_LABELS = dict(Role.choices)
 
     # Основные поля модели
     full_name = models.CharField(
@@ -198,8 +331,8 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     role = models.CharField(
         max_length=10,
-        choices=ROLE_CHOICES,
-        default='student',
+        choices=Role.choices,
+        default=Role.STUDENT,
         verbose_name="Роль",
         help_text="Роль пользователя в системе"
     )
@@ -229,32 +362,70 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
-        ordering = ['full_name']
+        # Без ordering по умолчанию: вход и выборки по PK/email не сортируются,
+        # списки задают order_by явно
+        indexes = [
+            # Вход студента: поиск по роли, группе и ФИО
+            models.Index(
+                fields=['role', 'group_name', 'full_name'],
+                name='user_student_login_idx'
+            ),
+            # Списки студентов: role='student' с сортировкой по ФИО
+            models.Index(
+                fields=['role', 'full_name'],
+                name='user_role_name_idx'
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(role__in=UserRole.values),
+                name='user_role_valid'
+            ),
+        ]
 
     def __str__(self) -> str:
         """Строковое представление пользователя."""
-        return (
-            f"{self.full_name} ({self.group_name})"
-            if self.group_name
-            else self.full_name
-        )
+        if self.group_name:
+            return "%s (%s)" % (self.full_name, self.group_name)
+        return self.full_name
+
+    @property
+    def role_display(self) -> str:
+        """Название роли пользователя."""
+        return self._ROLE_LABELS.get(self.role, self.role)
+
+
+class ExperimentsManager(models.Manager):
+    """
+    Менеджер экспериментов: студент и лаборант подгружаются тем же запросом.
+
+    __str__ и списки экспериментов обращаются к user, поэтому без JOIN
+    каждая строка порождала бы отдельный запрос к User.
+    """
+
+    def get_queryset(self) -> models.QuerySet:
+        return super().get_queryset().select_related('user', 'assistant')
 
 
 class Experiments(models.Model):
-    STATUS_CHOICES = [
-        ('preparing', 'Подготовка'),
-        ('stage_1', 'Этап 1 — запись'),  # Частота будет в stages[0].frequency
-        ('stage_2', 'Этап 2 — запись'),  # Аналогично
-        ('stage_3', 'Этап 3 — запись'),
-        ('completed', 'Завершен'),
-        ('failed', 'Провальный'),
-        ('aborted', 'Прерван'),
-    ]
+    class Status(models.TextChoices):
+        """Статусы эксперимента."""
+        PREPARING = 'preparing', 'Подготовка'
+        STAGE_1 = 'stage_1', 'Этап 1 — запись'  # Частота будет в stages[0].frequency
+        STAGE_2 = 'stage_2', 'Этап 2 — запись'  # Аналогично
+        STAGE_3 = 'stage_3', 'Этап 3 — запись'
+        COMPLETED = 'completed', 'Завершен'
+        FAILED = 'failed', 'Провальный'
+        ABORTED = 'aborted', 'Прерван'
+
+    _STATUS_LABELS = dict(Status.choices)
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='experiments')
+    # Отдельные индексы FK не нужны: user и assistant - ведущие столбцы
+    # exp_user_created_idx и exp_assistant_status_idx
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='experiments', db_index=False)
 
-    assistant = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='assisted_experiments')
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='started')
+    assistant = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='assisted_experiments', db_index=False)
+    status = models.CharField(max_length=20, choices=Status.choices, default='started')
     step = models.IntegerField(default=1)  # Добавить
 
     temperature = models.FloatField(verbose_name="Температура (°C)", default=20.0)
@@ -262,6 +433,7 @@ class Experiments(models.Model):
 
     stages = models.JSONField(
         default=list,
+        encoder=OrjsonEncoder,
         help_text="""Данные этапов: [\"
                  "{'frequency': 1500, 'data': [...]}, \"
                  "{'frequency': 3000, 'data': [...]}, ...]""")
@@ -306,15 +478,101 @@ class Experiments(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)  # Заменить date
     completed_at = models.DateTimeField(verbose_name="Дата и время завершения", null=True, blank=True) # Добавлено поле
+    # Отметка последнего изменения - по ней устаревают кэшированные списки
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    objects = ExperimentsManager()
+
+    # Поэтапные поля: имя без суффикса -> столбцы этапов 1..3
+    STAGE_FIELDS = {
+        name: tuple(f'{name}_stage{i}' for i in STAGE_NUMBERS)
+        for name in (
+            'student_speed',
+            'student_gamma',
+            'system_speed',
+            'system_gamma',
+            'error_percent_speed',
+            'error_percent_gamma',
+        )
+    }
+    _STAGE_GETTERS = {
+        name: attrgetter(*fields) for name, fields in STAGE_FIELDS.items()
+    }
 
     class Meta:
         verbose_name = "Эксперимент"
         verbose_name_plural = "Эксперименты"
         ordering = ['-created_at']  # This is the correct field name
+        indexes = [
+            # Списки экспериментов в порядке по умолчанию
+            models.Index(fields=['-created_at'], name='exp_created_desc_idx'),
+            # Фильтр по статусу вместе с сортировкой - одним проходом по индексу
+            models.Index(fields=['status', '-created_at'], name='exp_status_created_idx'),
+            # Список экспериментов студента от новых к старым
+            models.Index(fields=['user', '-created_at'], name='exp_user_created_idx'),
+            # Активные эксперименты лаборанта (assistant + status__in)
+            models.Index(fields=['assistant', 'status'], name='exp_assistant_status_idx'),
+            # Активные эксперименты (идет запись этапа) - небольшой частичный индекс
+            models.Index(
+                fields=['created_at'],
+                name='exp_active_idx',
+                condition=models.Q(status__in=['stage_1', 'stage_2', 'stage_3'])
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Эксперимент #{self.id} ({self.user.full_name})"
 
+    def clean(self) -> None:
+        """
+        Проверяет структуру stages при валидации формы/админки.
+
+        Проверка выполняется только в clean(), а не на каждом save().
+
+        Raises:
+            ValidationError: Если stages не список словарей
+        """
+        super().clean()
+        if not isinstance(self.stages, list) or not all(
+            isinstance(stage, dict) for stage in self.stages
+        ):
+            raise ValidationError(
+                {'stages': "Данные этапов должны быть списком объектов"}
+            )
+
+    @property
+    def status_display(self) -> str:
+        """Название статуса эксперимента."""
+        return self._STATUS_LABELS.get(self.status, self.status)
+
+    def stage_values(self, name: str) -> tuple:
+        """
+        Значения поэтапного поля по всем этапам одним вызовом.
+
+        Args:
+            name: Имя поля без суффикса этапа, например 'system_gamma'
+
+        Returns:
+            tuple: Значения для этапов 1..3
+        """
+        return self._STAGE_GETTERS[name](self)
+
+    def set_stage_values(self, name: str, values) -> tuple:
+        """
+        Записывает значения поэтапного поля для всех этапов.
+
+        Args:
+            name: Имя поля без суффикса этапа, например 'student_speed'
+            values: Значения для этапов 1..3
+
+        Returns:
+            tuple: Имена измененных столбцов (для update_fields)
+        """
+        fields = self.STAGE_FIELDS[name]
+        for field, value in zip(fields, values):
+            setattr(self, field, value)
+        return fields
+
 
 class EquipmentData(models.Model):
     """Модель для хранения данных с оборудования во время эксперимента."""
@@ -326,8 +584,9 @@ class EquipmentData(models.Model):
         verbose_name="Эксперимент"
     )
     time_ms = models.IntegerField(verbose_name="Время (мс)")
-    microphone_signal = models.IntegerField(
-        validators=[MinValueValidator(0), MaxValueValidator(1023)],
+    # 10-битное значение АЦП (0..1023) умещается в smallint (2 байта)
+    microphone_signal = models.PositiveSmallIntegerField(
+        validators=[MaxValueValidator(1023)],
         verbose_name="Сигнал микрофона"
     )
     tube_position = models.FloatField(verbose_name="Положение трубы (мм)")
@@ -337,21 +596,84 @@ class EquipmentData(models.Model):
         verbose_name = "Данные оборудования"
         verbose_name_plural = "Данные оборудования"
         ordering = ['time_ms']
+        indexes = [
+            # Чтение временного ряда эксперимента: диапазонный проход по
+            # индексу уже в порядке time_ms, значения берутся из индекса
+            models.Index(
+                fields=['experiment', 'time_ms'],
+                include=['microphone_signal', 'tube_position', 'voltage'],
+                name='eqdata_exp_time_covering'
+            ),
+        ]
 
     def __str__(self) -> str:
-        return f"Данные #{self.id} (Эксперимент {self.experiment.id})"
+        return f"Данные #{self.id} (Эксперимент {self.experiment_id})"
+
+    @classmethod
+    def bulk_insert(cls, experiment_id: int, rows) -> int:
+        """
+        Массово записывает отсчеты эксперимента командами COPY.
+
+        В обход ORM: не создаются объекты модели и нет запроса на каждую
+        строку. COPY не вызывает валидаторы, поэтому диапазон сигнала
+        проверяется здесь до отправки данных.
+
+        Args:
+            experiment_id: id эксперимента
+            rows: Последовательность кортежей
+                (time_ms, microphone_signal, tube_position, voltage)
+
+        Returns:
+            int: Количество записанных строк
+
+        Raises:
+            ValidationError: Если сигнал микрофона вне диапазона 0..1023
+        """
+        columns = (
+            f'COPY {connection.ops.quote_name(cls._meta.db_table)} '
+            '(experiment_id, time_ms, microphone_signal, tube_position, voltage) '
+            'FROM STDIN WITH (FORMAT csv)'
+        )
+        rows = iter(rows)
+        count = 0
+        # Строки уходят пакетами: в памяти держится не больше одного
+        # пакета, а ошибка в середине потока откатывает всю загрузку
+        with transaction.atomic(), connection.cursor() as cursor:
+            while True:
+                batch = list(islice(rows, EQUIPMENT_BATCH_SIZE))
+                if not batch:
+                    break
+
+                buffer = io.StringIO()
+                for time_ms, microphone_signal, tube_position, voltage in batch:
+                    microphone_signal = int(microphone_signal)
+                    if not 0 <= microphone_signal <= 1023:
+                        raise ValidationError(
+                            f"Сигнал микрофона вне диапазона 0..1023: {microphone_signal}"
+                        )
+                    buffer.write(
+                        f"{experiment_id},{int(time_ms)},{microphone_signal},"
+                        f"{float(tube_position)},{float(voltage)}\n"
+                    )
+
+                buffer.seek(0)
+                cursor.copy_expert(columns, buffer)
+                count += len(batch)
+        return count
 
 
 class Results(models.Model):
     """Модель для хранения результатов экспериментов."""
 
-    STATUS_CHOICES = [
-        ('success', 'Успешно'),
-        ('fail', 'Провальный'),
-        ('pending_student_input', 'Ожидает ввода студента'),
-        ('completed_by_assistant', 'Завершен лаборантом'),
-        ('final_completed', 'Полностью завершен')
-    ]
+    class Status(models.TextChoices):
+        """Статусы результатов эксперимента."""
+        SUCCESS = 'success', 'Успешно'
+        FAIL = 'fail', 'Провальный'
+        PENDING_STUDENT_INPUT = 'pending_student_input', 'Ожидает ввода студента'
+        COMPLETED_BY_ASSISTANT = 'completed_by_assistant', 'Завершен лаборантом'
+        FINAL_COMPLETED = 'final_completed', 'Полностью завершен'
+
+    _STATUS_LABELS = dict(Status.choices)
 
     experiment = models.OneToOneField(Experiments, on_delete=models.CASCADE, primary_key=True)
     # gamma_calculated = models.FloatField(verbose_name="Рассчитанное γ (система)", default=0.0) # УСТАРЕЛО, данные теперь в Experiments поэтапно
@@ -365,16 +687,22 @@ class Results(models.Model):
     # Возможно, здесь будут храниться обобщенные результаты или статусы, но конкретные значения по этапам теперь в Experiments
     # Например, итоговый статус или оценка, если она будет
 
-    status = models.CharField(max_length=30, choices=STATUS_CHOICES, default='pending_student_input')
-    visualization_data = models.JSONField(default=dict) # Может хранить данные для графиков студента, если они отличаются
-    detailed_results = models.JSONField(default=list) # Данные по этапам от консумера - это поле кажется важным, его нужно проверить. Возможно, сюда и должны сохраняться системные расчеты по этапам.
+    status = models.CharField(max_length=30, choices=Status.choices, default=Status.PENDING_STUDENT_INPUT, db_index=True)
+    visualization_data = models.JSONField(default=dict, encoder=OrjsonEncoder) # Может хранить данные для графиков студента, если они отличаются
+    detailed_results = models.JSONField(default=list, encoder=OrjsonEncoder) # Данные по этапам от консумера - это поле кажется важным, его нужно проверить. Возможно, сюда и должны сохраняться системные расчеты по этапам.
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
 
     class Meta:
         verbose_name = "Результат"
         verbose_name_plural = "Результаты"
 
     def __str__(self) -> str:
-        return f"Результаты для эксперимента #{self.experiment.id} ({self.status})"
+        return f"Результаты для эксперимента #{self.experiment_id} ({self.status})"
+
+    @property
+    def status_display(self) -> str:
+        """Название статуса результатов."""
+        return self._STATUS_LABELS.get(self.status, self.status)
 
 
 class Calculations(models.Model):
@@ -392,8 +720,8 @@ class Calculations(models.Model):
         verbose_name="Использованная формула",
         blank=True
     )
-    input_data = models.JSONField(verbose_name="Входные данные")
-    output_data = models.JSONField(verbose_name="Выходные данные")
+    input_data = models.JSONField(verbose_name="Входные данные", encoder=OrjsonEncoder)
+    output_data = models.JSONField(verbose_name="Выходные данные", encoder=OrjsonEncoder)
     timestamp = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Время выполнения"
@@ -402,7 +730,13 @@ class Calculations(models.Model):
     class Meta:
         verbose_name = "Расчёт"
         verbose_name_plural = "Расчёты"
-        ordering = ['step_number']
+        indexes = [
+            # Расчеты эксперимента читаются уже в порядке step_number
+            models.Index(
+                fields=['experiment', 'step_number'],
+                name='calc_exp_step_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
-        return f"Шаг #{self.step_number} (Эксперимент {self.experiment.id})"
\ No newline at end of file
+        return f"Шаг #{self.step_number} (Эксперимент {self.experiment_id})"
\ No newline at end of file
@@ -1,3 +1,260 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import (
+    Calculations,
+    EquipmentData,
+    Experiments,
+    Results,
+    User
+)
+
+
+class QueryCountTests(TestCase):
+    """
+    Фиксирует количество запросов на основных путях чтения,
+    чтобы N+1 не возвращался незаметно.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create(
+            email='ivanov.ivan.fiz-101@example.com',
+            full_name='Иванов Иван',
+            group_name='ФИЗ-101',
+            role='student'
+        )
+        cls.assistant = User.objects.create(
+            email='lab@example.com',
+            full_name='Петров Петр',
+            role='assistant'
+        )
+        cls.experiments = [
+            Experiments.objects.create(
+                user=cls.student,
+                assistant=cls.assistant,
+                status='preparing'
+            )
+            for _ in range(10)
+        ]
+        for experiment in cls.experiments:
+            Results.objects.create(experiment=experiment)
+            Calculations.objects.create(
+                experiment=experiment,
+                step_number=1,
+                description='Расчет скорости звука',
+                input_data={},
+                output_data={}
+            )
+            EquipmentData.objects.create(
+                experiment=experiment,
+                time_ms=0,
+                microphone_signal=512,
+                tube_position=0.0,
+                voltage=5.0
+            )
+
+    def test_experiment_list_queries(self):
+        """Список экспериментов с ФИО студента и лаборанта - один запрос."""
+        with self.assertNumQueries(1):
+            for experiment in Experiments.objects.all()[:10]:
+                str(experiment)
+                experiment.assistant.full_name
+
+    def test_related_str_does_not_load_experiment(self):
+        """__str__ зависимых моделей не обращается к таблице экспериментов."""
+        for model in (Results, Calculations, EquipmentData):
+            with self.subTest(model=model.__name__):
+                with self.assertNumQueries(1):
+                    [str(obj) for obj in model.objects.all()]
+
+    def test_teacher_home_queries_do_not_grow_with_students(self):
+        """Главная преподавателя: число запросов не зависит от числа студентов."""
+        teacher = User.objects.create(
+            email='teacher@example.com',
+            full_name='Сидоров Сидор',
+            role='teacher'
+        )
+        self.client.force_login(teacher)
+
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(reverse('home'))
+
+        for index in range(5):
+            student = User.objects.create(
+                email=f'student{index}@example.com',
+                full_name=f'Студент {index}',
+                group_name='ФИЗ-102',
+                role='student'
+            )
+            Experiments.objects.create(user=student, status='preparing')
+
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(reverse('home'))
+
+        self.assertEqual(len(after), len(before))
+
+
+class BulkCreateStudentsTests(TestCase):
+    """Массовое создание студентов через UserManager.bulk_create_students."""
+
+    ROWS = [
+        ('Иванов Иван', 'ФИЗ-101', 'start101'),
+        ('Петров Петр', 'ФИЗ-101', 'start101'),
+        ('Сидоров Сидор', 'ФИЗ-102', 'start102'),
+        ('Кузнецов Кузьма', 'ФИЗ-101', 'start101'),
+    ]
+
+    def test_each_distinct_password_hashed_once(self):
+        """Общий пароль группы хэшируется один раз, а не для каждого студента."""
+        with mock.patch(
+            'lab_data.models.make_password',
+            wraps=make_password
+        ) as hasher:
+            User.objects.bulk_create_students(self.ROWS)
+
+        hashed = sorted(call.args[0] for call in hasher.call_args_list)
+        self.assertEqual(hashed, ['start101', 'start102'])
+
+    def test_students_inserted_in_one_batch(self):
+        """Студенты вставляются одним INSERT с правильными email и паролями."""
+        with self.assertNumQueries(1):
+            created = User.objects.bulk_create_students(self.ROWS)
+
+        self.assertEqual(len(created), len(self.ROWS))
+        students = {
+            user.full_name: user
+            for user in User.objects.filter(role='student')
+        }
+        self.assertEqual(len(students), len(self.ROWS))
+        for full_name, group_name, password in self.ROWS:
+            with self.subTest(full_name=full_name):
+                student = students[full_name]
+                self.assertEqual(
+                    student.email,
+                    User.objects._student_email(full_name, group_name)
+                )
+                self.assertEqual(student.group_name, group_name)
+                self.assertFalse(student.is_staff)
+                self.assertTrue(student.check_password(password))
+
+        self.assertEqual(
+            students['Иванов Иван'].email,
+            'иванов.иван.физ-101@example.com'
+        )
+
+
+class ProtocolPdfTests(TestCase):
+    """Генерация PDF протокола эксперимента."""
+
+    def test_protocol_for_student_without_group(self):
+        """Протокол студента без группы формируется, а не падает с 500."""
+        student = User.objects.create(
+            email='nogroup@example.com',
+            full_name='Безгруппный Студент',
+            role='student'
+        )
+        experiment = Experiments.objects.create(user=student, status='completed')
+        self.client.force_login(student)
+
+        response = self.client.get(
+            reverse('download_protocol_pdf', args=[experiment.id])
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+
+class UploadExperimentDataTests(TestCase):
+    """Загрузка отсчетов оборудования лаборантом."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create(
+            email='petrov.petr.fiz-101@example.com',
+            full_name='Петров Петр',
+            group_name='ФИЗ-101',
+            role='student'
+        )
+        cls.assistant = User.objects.create(
+            email='upload-lab@example.com',
+            full_name='Сергеев Сергей',
+            role='assistant'
+        )
+        cls.experiment = Experiments.objects.create(
+            user=cls.student,
+            assistant=cls.assistant,
+            status='stage_1',
+            stages=[{'frequency': 1500.0, 'data': []} for _ in range(3)]
+        )
+        cls.url = reverse('upload_experiment_data_api', args=[cls.experiment.id])
+
+    def post(self, payload):
+        return self.client.post(
+            self.url, json.dumps(payload), content_type='application/json'
+        )
+
+    def test_batch_is_written_to_equipment_data_and_stage(self):
+        """Пакет отсчетов записывается в EquipmentData и в данные этапа."""
+        self.client.force_login(self.assistant)
+        samples = [
+            {'time_ms': i, 'microphone_signal': 500 + i, 'tube_position': i / 10, 'voltage': 5.0}
+            for i in range(3)
+        ]
+
+        response = self.post({'stage': 2, 'samples': samples})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(
+            list(EquipmentData.objects.filter(
+                experiment=self.experiment
+            ).order_by('time_ms').values_list('time_ms', 'microphone_signal')),
+            [(0, 500), (1, 501), (2, 502)]
+        )
+        self.experiment.refresh_from_db()
+        self.assertEqual(self.experiment.stages[1]['data'], samples)
+
+    def test_single_sample(self):
+        """Одиночный отсчет в полях запроса по-прежнему принимается."""
+        self.client.force_login(self.assistant)
+
+        response = self.post({
+            'stage': 1, 'time_ms': 10, 'microphone_signal': 512,
+            'tube_position': 0.5, 'voltage': 5.0
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(EquipmentData.objects.filter(experiment=self.experiment).count(), 1)
+
+    def test_only_assistant_can_upload(self):
+        """Отсчеты загружает только лаборант эксперимента."""
+        self.client.force_login(self.student)
+
+        response = self.post({'samples': [
+            {'time_ms': 0, 'microphone_signal': 512, 'tube_position': 0.0, 'voltage': 5.0}
+        ]})
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(EquipmentData.objects.filter(experiment=self.experiment).exists())
+
+    def test_invalid_signal_rejects_whole_batch(self):
+        """Сигнал вне диапазона отклоняет весь пакет без частичной записи."""
+        self.client.force_login(self.assistant)
+
+        response = self.post({'samples': [
+            {'time_ms': 0, 'microphone_signal': 512, 'tube_position': 0.0, 'voltage': 5.0},
+            {'time_ms': 1, 'microphone_signal': 4096, 'tube_position': 0.0, 'voltage': 5.0},
+        ]})
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(EquipmentData.objects.filter(experiment=self.experiment).exists())
+        self.experiment.refresh_from_db()
+        self.assertEqual(self.experiment.stages[0]['data'], [])
@@ -6,12 +6,16 @@ from django.http import (
     FileResponse
 )
 from django.shortcuts import get_object_or_404, render, redirect
+from django.db import DatabaseError, transaction
+from django.db.models import Case, CharField, Count, F, Max, Prefetch, Q, Value, When
+from django.db.models.functions import Coalesce
 from django.contrib.auth import login as auth_login
 from django.contrib import messages
 from django.views import View
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.decorators.http import require_http_methods
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth import login as authenticate
 from django.contrib.auth import logout as auth_logout
@@ -19,12 +23,13 @@ from django.contrib.auth import get_user_model
 from typing import Dict, Any, Optional
 import json
 import logging
+import math
 import os
 from config import config
 from django.forms.models import model_to_dict
 import numpy as np
 
-from .models import User, Experiments, EquipmentData, Results
+from .models import STAGE_NUMBERS, User, Experiments, EquipmentData, Results
 from .imitate_module.sensors_simulator import ExperimentSimulator
 from .forms import StudentLoginForm, TeacherLoginForm, StudentResultForm, AssistantLoginForm
 from .generate_graphs import (
@@ -34,15 +39,22 @@ from .generate_graphs import (
 )
 from django.template.loader import render_to_string
 
-from reportlab.pdfgen import canvas
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import cm
+from reportlab.platypus import HRFlowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from xml.sax.saxutils import escape
 
 from io import BytesIO
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from django.conf import settings
 
+try:
+    import orjson
+except ImportError:  # orjson не установлена - используется стандартный json
+    orjson = None
 
 
 # Настройка логгера
@@ -58,6 +70,311 @@ logger.addHandler(handler)
 USE_SIMULATION = True
 
 
+def _parse_json_body(request) -> Any:
+    """
+    Разбирает JSON из тела запроса.
+
+    Args:
+        request: HttpRequest объект
+
+    Returns:
+        Any: Разобранные данные
+
+    Raises:
+        ValueError: Тело запроса не является корректным JSON
+            (orjson.JSONDecodeError наследует json.JSONDecodeError)
+    """
+    if orjson is not None:
+        return orjson.loads(request.body)
+    return json.loads(request.body)
+
+
+def _json_response(payload: Dict[str, Any], status: int = 200) -> HttpResponse:
+    """
+    JSON-ответ, сериализованный orjson (без него - обычный JsonResponse).
+
+    Args:
+        payload: Данные ответа
+        status: HTTP-статус
+
+    Returns:
+        HttpResponse: Ответ с content_type application/json
+    """
+    if orjson is None:
+        return JsonResponse(payload, status=status)
+    return HttpResponse(
+        orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+        content_type='application/json',
+        status=status
+    )
+
+# Шрифт протокола с поддержкой кириллицы
+PROTOCOL_FONT = 'DejaVu'
+PROTOCOL_FONT_PATH = os.path.join(settings.BASE_DIR, 'static', 'fonts', 'DejaVuSans-Bold.ttf')
+
+# Строки таблицы этапов в протоколе: подпись и поэтапное поле
+PROTOCOL_STAGE_ROWS = (
+    ("Введенная скорость звука, м/с", 'student_speed'),
+    ("Введенное значение γ", 'student_gamma'),
+    ("Рассчитанная скорость звука, м/с", 'system_speed'),
+    ("Рассчитанное значение γ", 'system_gamma'),
+    ("Отклонение скорости, %", 'error_percent_speed'),
+    ("Отклонение γ, %", 'error_percent_gamma'),
+)
+
+# Стили протокола создаются один раз на процесс и общие для всех PDF
+PROTOCOL_STYLES = {
+    'title': ParagraphStyle(
+        'ProtocolTitle', fontName=PROTOCOL_FONT, fontSize=16, leading=20,
+        spaceAfter=0.5 * cm
+    ),
+    'heading': ParagraphStyle(
+        'ProtocolHeading', fontName=PROTOCOL_FONT, fontSize=14, leading=18,
+        spaceBefore=0.5 * cm, spaceAfter=0.25 * cm
+    ),
+    'body': ParagraphStyle(
+        'ProtocolBody', fontName=PROTOCOL_FONT, fontSize=12, leading=0.5 * cm
+    ),
+}
+PROTOCOL_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), PROTOCOL_FONT),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+def _register_protocol_font() -> None:
+    """
+    Регистрирует шрифт протокола в ReportLab, если он еще не зарегистрирован.
+
+    Разбор TTF-файла дорогой, поэтому выполняется один раз на процесс,
+    а не при каждой генерации PDF.
+    """
+    if PROTOCOL_FONT not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(PROTOCOL_FONT, PROTOCOL_FONT_PATH))
+
+
+try:
+    _register_protocol_font()
+except Exception as e:  # Нет файла шрифта - повторная попытка при генерации PDF
+    logger.warning(f"Не удалось зарегистрировать шрифт протокола: {str(e)}")
+
+
+# Поля, которые нужны спискам экспериментов студента. Тяжелые JSON-поля
+# (этапы, данные графиков, детальные результаты) в списках не читаются.
+# user и assistant менеджер подгружает JOIN-ом, поэтому их поля указаны явно
+EXPERIMENT_LIST_FIELDS = (
+    'id',
+    'created_at',
+    'status',
+    'user__full_name',
+    'assistant__full_name',
+    'results__status',
+)
+
+# Поля, которые студент обязан передать при сохранении результатов
+STUDENT_RESULT_FIELDS = [
+    f'student_{quantity}_stage{i}'
+    for i in range(1, 4)
+    for quantity in ('speed', 'gamma')
+] + ['student_final_gamma']
+
+# Прореживание полного сигнала этапа для графика студента: сигнал длиннее
+# MAX_POINTS_FULL_SIGNAL точек прореживается примерно до TARGET_POINTS_AFTER_DECIMATION
+MAX_POINTS_FULL_SIGNAL = 2000
+TARGET_POINTS_AFTER_DECIMATION = 1000
+
+# Время жизни кэша списков на главной странице в секундах. Ключ кэша
+# меняется при любом изменении экспериментов, таймаут лишь ограничивает
+# устаревание ФИО и групп студентов
+HOME_CACHE_TIMEOUT = 300
+
+# Статусы незавершенного эксперимента: подготовка и запись этапов
+STAGE_STATUSES = frozenset({'preparing', 'stage_1', 'stage_2', 'stage_3'})
+
+# Отображение статусов в списках экспериментов: статус -> (подпись, класс badge).
+# Подпись None означает название статуса из модели (status_display).
+# Статус Results приоритетнее статуса эксперимента
+STUDENT_RESULTS_STATUS_MAP = {
+    'pending_student_input': ('в процессе выполнения', 'bg-primary'),
+    'success': ('Завершен', 'bg-success'),
+    'final_completed': ('Завершен', 'bg-success'),
+    'fail': (None, 'bg-danger'),
+}
+STUDENT_EXPERIMENT_STATUS_MAP = {
+    'failed': (None, 'bg-danger'),
+    'completed': ('Ожидает ваших результатов', 'bg-info'),
+    'aborted': (None, 'bg-dark'),
+    **{status: (None, 'bg-warning') for status in STAGE_STATUSES},
+}
+TEACHER_RESULTS_STATUS_MAP = {
+    'pending_student_input': ('В процессе (студент)', 'bg-primary'),
+    'success': ('Завершен (успешно)', 'bg-success'),
+    'final_completed': ('Завершен (успешно)', 'bg-success'),
+    'fail': ('Провален', 'bg-danger'),
+}
+TEACHER_EXPERIMENT_STATUS_MAP = {
+    'failed': ('Провален (системой)', 'bg-danger'),
+    'completed': ('Ожидает данных студента', 'bg-warning'),
+    'aborted': (None, 'bg-dark'),
+    **{status: (None, 'bg-warning text-dark') for status in STAGE_STATUSES},
+}
+
+
+def _experiment_status_annotations(
+    results_map: Dict[str, tuple],
+    experiment_map: Dict[str, tuple],
+    default_badge: str
+) -> Dict[str, Case]:
+    """
+    Подпись и класс badge статуса эксперимента для списков.
+
+    Статус Results приоритетнее статуса эксперимента. Подпись и класс
+    вычисляются базой в запросе списка, поэтому строки приходят уже
+    готовыми к выводу.
+
+    Args:
+        results_map: Отображение статусов Results
+        experiment_map: Отображение статусов эксперимента
+        default_badge: Класс badge для статусов эксперимента вне отображения
+
+    Returns:
+        dict: Аргументы для annotate() - list_status_label и list_badge_class
+    """
+    label_whens = []
+    badge_whens = []
+    for status, default_label in Results._STATUS_LABELS.items():
+        label, badge_class = results_map.get(status, (None, 'bg-info'))
+        label_whens.append(When(results__status=status, then=Value(label or default_label)))
+        badge_whens.append(When(results__status=status, then=Value(badge_class)))
+
+    # Статус Results вне choices выводится как есть
+    has_other_results_status = Q(results__status__isnull=False) & ~Q(results__status='')
+    label_whens.append(When(has_other_results_status, then=F('results__status')))
+    badge_whens.append(When(has_other_results_status, then=Value('bg-info')))
+
+    for status, default_label in Experiments._STATUS_LABELS.items():
+        label, badge_class = experiment_map.get(status, (None, default_badge))
+        label_whens.append(When(status=status, then=Value(label or default_label)))
+        badge_whens.append(When(status=status, then=Value(badge_class)))
+
+    return {
+        'list_status_label': Case(
+            *label_whens, default=F('status'), output_field=CharField()
+        ),
+        'list_badge_class': Case(
+            *badge_whens, default=Value(default_badge), output_field=CharField()
+        ),
+    }
+
+
+def _home_cache_key(scope: str, stamp: Dict[str, Any]) -> str:
+    """
+    Ключ кэша списка на главной странице.
+
+    Args:
+        scope: Область списка (студент или преподаватели)
+        stamp: Агрегаты, меняющиеся при изменении данных списка
+
+    Returns:
+        str: Ключ кэша
+    """
+    return ':'.join(['home', scope, *(str(value) for value in stamp.values())])
+
+
+def _build_student_experiments(student: User) -> list:
+    """
+    Строит список экспериментов студента для главной страницы.
+
+    Args:
+        student: Студент
+
+    Returns:
+        list: Словари с данными экспериментов, от новых к старым
+    """
+    # values() отдает словари прямо из строк запроса, без создания моделей;
+    # подпись и класс badge вычисляет база
+    rows = Experiments.objects.filter(user=student).values(
+        'id',
+        'created_at',
+        'status',
+        'results__status',
+    ).annotate(
+        assistant_display=Coalesce('assistant__full_name', Value('Нет данных')),
+        **_experiment_status_annotations(
+            STUDENT_RESULTS_STATUS_MAP,
+            STUDENT_EXPERIMENT_STATUS_MAP,
+            'bg-light text-dark'
+        )
+    ).order_by('-created_at')
+
+    return [
+        {
+            'id': row['id'],
+            'created_at': row['created_at'], # Оставляем datetime для шаблонизатора
+            'status_for_student': row['list_status_label'],
+            'raw_experiment_status': row['status'], # Оригинальный статус из Experiments
+            'results_status': row['results__status'], # Статус из Results
+            'assistant_name': row['assistant_display'],
+            'status_badge_class': row['list_badge_class'] # Новое поле для класса badge
+        }
+        for row in rows
+    ]
+
+
+def _build_teacher_students() -> list:
+    """
+    Строит список студентов с их экспериментами для преподавателя.
+
+    Returns:
+        list: Словари студентов (по группе и ФИО) с экспериментами
+    """
+    students_with_experiments = []
+    # Получаем всех студентов; их эксперименты подгружаются одним
+    # дополнительным запросом, а не отдельным запросом на каждого студента
+    all_students = User.objects.filter(role='student').order_by(
+        'group_name', 'full_name'
+    ).prefetch_related(
+        Prefetch(
+            'experiments',
+            queryset=Experiments.objects.select_related('results').only(
+                *EXPERIMENT_LIST_FIELDS
+            ).annotate(
+                **_experiment_status_annotations(
+                    TEACHER_RESULTS_STATUS_MAP,
+                    TEACHER_EXPERIMENT_STATUS_MAP,
+                    'bg-secondary'
+                )
+            ).order_by('-created_at'),
+            to_attr='prefetched_experiments'
+        )
+    )
+
+    for student in all_students:
+        student_experiments_data = []
+        for exp in student.prefetched_experiments:
+            results = getattr(exp, 'results', None)
+            student_experiments_data.append({
+                'id': exp.id,
+                'created_at': exp.created_at,
+                # Подпись и класс badge вычислены в запросе
+                'status_display': exp.list_status_label,
+                'badge_class': exp.list_badge_class,
+                'raw_status_experiment': exp.status,
+                'raw_status_results': results.status if results else None,
+            })
+
+        students_with_experiments.append({
+            'student_id': student.id,
+            'full_name': student.full_name,
+            'group_name': student.group_name if student.group_name else 'Без группы',
+            'experiments': student_experiments_data
+        })
+    return students_with_experiments
+
+
 @login_required
 def home_view(request) -> HttpResponse:
     """
@@ -73,63 +390,22 @@ def home_view(request) -> HttpResponse:
     context: Dict[str, Any] = {
         'user': request.user,
         'full_name': request.user.full_name,
-        'role': request.user.get_role_display(),
+        'role': request.user.role_display,
     }
 
     if request.user.role == 'student':
         logger.info(f"Building context for student: {request.user.email}")
         try:
-            experiments_query = Experiments.objects.filter(
-                user=request.user
-            ).select_related('assistant', 'results').order_by('-created_at')
-            
-            logger.info(f"Found {experiments_query.count()} raw experiments for student {request.user.email}.")
-
-            student_experiments_data = []
-            for exp in experiments_query:
-                student_facing_status = 'Неизвестно'
-                badge_class = 'bg-secondary' # Класс для badge по умолчанию
-                results_status = exp.results.status if hasattr(exp, 'results') and exp.results else None
-                exp_status_from_model = exp.status # Статус из модели Experiment
-
-                if results_status: # Если есть статус в Results
-                    if results_status == 'pending_student_input':
-                        student_facing_status = 'в процессе выполнения'
-                        badge_class = 'bg-primary' 
-                    elif results_status == 'success' or results_status == 'final_completed':
-                        student_facing_status = 'Завершен'
-                        badge_class = 'bg-success'
-                    elif results_status == 'fail':
-                        student_facing_status = exp.results.get_status_display() # Должно быть 'Ошибка'
-                        badge_class = 'bg-danger'
-                    else: # Другие возможные статусы Results
-                        student_facing_status = exp.results.get_status_display()
-                        badge_class = 'bg-info' # Общий класс для прочих Result статусов
-                elif exp_status_from_model == 'failed': # Обработка нового статуса Experiments
-                    student_facing_status = exp.get_status_display() # Должно вернуть "Провальный"
-                    badge_class = 'bg-danger'
-                elif exp_status_from_model == 'completed':
-                    student_facing_status = 'Ожидает ваших результатов'
-                    badge_class = 'bg-info'
-                else:
-                    # Статус из модели Experiment, если нет данных в Results
-                    student_facing_status = exp.get_status_display()
-                    if exp_status_from_model == 'aborted':
-                        badge_class = 'bg-dark'
-                    elif exp_status_from_model == 'preparing' or 'stage' in exp_status_from_model:
-                        badge_class = 'bg-warning'
-                    else:
-                        badge_class = 'bg-light text-dark'
-
-                student_experiments_data.append({
-                    'id': exp.id,
-                    'created_at': exp.created_at, # Оставляем datetime для шаблонизатора
-                    'status_for_student': student_facing_status,
-                    'raw_experiment_status': exp.status, # Оригинальный статус из Experiments
-                    'results_status': results_status, # Статус из Results
-                    'assistant_name': exp.assistant.full_name if exp.assistant else 'Нет данных',
-                    'status_badge_class': badge_class # Новое поле для класса badge
-                })
+            stamp = Experiments.objects.filter(user=request.user).aggregate(
+                n_experiments=Count('id'),
+                changed=Max('updated_at'),
+                results_changed=Max('results__updated_at')
+            )
+            student_experiments_data = cache.get_or_set(
+                _home_cache_key(f'student:{request.user.id}', stamp),
+                lambda: _build_student_experiments(request.user),
+                HOME_CACHE_TIMEOUT
+            )
             
             context['student_experiments_list'] = student_experiments_data
             logger.info(f"Prepared {len(student_experiments_data)} experiments for student {request.user.email} to display. Data: {student_experiments_data}")
@@ -143,63 +419,19 @@ def home_view(request) -> HttpResponse:
     elif request.user.role == 'teacher':
         logger.info(f"Building context for teacher: {request.user.email}")
         
-        students_with_experiments = []
-        # Получаем всех студентов
-        all_students = User.objects.filter(role='student').order_by('group_name', 'full_name')
-        
-        for student in all_students:
-            experiments_query = Experiments.objects.filter(
-                user=student
-            ).select_related('results').order_by('-created_at')
-            
-            student_experiments_data = []
-            for exp in experiments_query:
-                results = getattr(exp, 'results', None)
-                status_display = 'Неизвестно'
-                badge_class = 'bg-secondary'
-
-                if results:
-                    if results.status == 'pending_student_input':
-                        status_display = 'В процессе (студент)'
-                        badge_class = 'bg-primary'
-                    elif results.status == 'success' or results.status == 'final_completed':
-                        status_display = 'Завершен (успешно)'
-                        badge_class = 'bg-success'
-                    elif results.status == 'fail':
-                        status_display = 'Провален'
-                        badge_class = 'bg-danger'
-                    else:
-                        status_display = results.get_status_display()
-                        badge_class = 'bg-info'
-                elif exp.status == 'failed':
-                    status_display = 'Провален (системой)'
-                    badge_class = 'bg-danger'
-                elif exp.status == 'completed':
-                    status_display = 'Ожидает данных студента'
-                    badge_class = 'bg-warning'
-                else:
-                    status_display = exp.get_status_display()
-                    # Дополнительные классы можно назначить здесь на основе exp.status
-                    if exp.status == 'aborted':
-                        badge_class = 'bg-dark'
-                    elif 'stage' in exp.status or exp.status == 'preparing':
-                        badge_class = 'bg-warning text-dark'
-                    
-                student_experiments_data.append({
-                    'id': exp.id,
-                    'created_at': exp.created_at,
-                    'status_display': status_display,
-                    'badge_class': badge_class,
-                    'raw_status_experiment': exp.status,
-                    'raw_status_results': results.status if results else None,
-                })
-            
-            students_with_experiments.append({
-                'student_id': student.id,
-                'full_name': student.full_name,
-                'group_name': student.group_name if student.group_name else 'Без группы',
-                'experiments': student_experiments_data
-            })
+        # Список общий для всех преподавателей; ключ учитывает состав
+        # студентов и последние изменения их экспериментов
+        stamp = User.objects.filter(role='student').aggregate(
+            n_students=Count('id', distinct=True),
+            n_experiments=Count('experiments'),
+            changed=Max('experiments__updated_at'),
+            results_changed=Max('experiments__results__updated_at')
+        )
+        students_with_experiments = cache.get_or_set(
+            _home_cache_key('teacher', stamp),
+            _build_teacher_students,
+            HOME_CACHE_TIMEOUT
+        )
             
         context.update({
             'students_with_experiments': students_with_experiments,
@@ -217,12 +449,13 @@ def home_view(request) -> HttpResponse:
         # Пока оставим как есть, предполагая, что есть общая home_view.
         
         # Пример: если лаборанту тоже нужен список его активных экспериментов на общей home
-        context['active_experiments_for_assistant'] = Experiments.objects.filter(
+        # Список вычисляется один раз: длина для лога берется без COUNT(*)
+        context['active_experiments_for_assistant'] = list(Experiments.objects.filter(
             assistant=request.user,
-            status__in=['preparing', 'stage_1', 'stage_2', 'stage_3']
-        ).select_related('user').order_by('-created_at')
+            status__in=STAGE_STATUSES
+        ).select_related('user').order_by('-created_at'))
         context['students_for_assistant'] = User.objects.filter(role='student').order_by('full_name')
-        logger.info(f"Found {context['active_experiments_for_assistant'].count()} active experiments for assistant {request.user.email}")
+        logger.info(f"Found {len(context['active_experiments_for_assistant'])} active experiments for assistant {request.user.email}")
 
 
     return render(request, 'home.html', context)
@@ -247,7 +480,7 @@ def group_students_view(request, group_name: str) -> HttpResponse:
         return HttpResponseForbidden()
 
     logger.info(f"Teacher {request.user.email} viewing group {group_name}")
-    students = User.objects.filter(
+    students = User.objects.with_stats().filter(
         role='student',
         group_name=group_name
     ).order_by('full_name')
@@ -365,15 +598,17 @@ class TeacherLoginView(View):
 
 @login_required
 def experiment_results(request, experiment_id):
-    experiment = get_object_or_404(Experiments, id=experiment_id)
+    # Шаблон строит графики из experiment.stages и читает experiment.results;
+    # отсчеты EquipmentData на странице не выводятся и не загружаются
+    experiment = get_object_or_404(
+        Experiments.objects.select_related('results'), id=experiment_id
+    )
     
     if request.user != experiment.user and request.user != experiment.assistant:
         raise PermissionDenied
     
-    data_points = EquipmentData.objects.filter(experiment=experiment).order_by('time_ms')
     context = {
         'experiment': experiment,
-        'data_points': data_points,
         'is_assistant': request.user == experiment.assistant
     }
     return render(request, 'experiment/results.html', context)
@@ -440,19 +675,25 @@ class DownloadManualView(LoginRequiredMixin, View):
             FileResponse: PDF файл или 404 ошибка
         """
         file_path = config.MANUAL_PDF_PATH
-        if os.path.exists(file_path):
-            logger.info(f"User {request.user.email} downloaded manual")
-            return FileResponse(
-                open(file_path, 'rb'),
-                content_type='application/pdf'
-            )
-        
-        logger.error(f"Manual not found at {file_path}")
-        raise Http404("Методичка не найдена")
+        try:
+            manual_file = open(file_path, 'rb')
+        except FileNotFoundError:
+            logger.error(f"Manual not found at {file_path}")
+            raise Http404("Методичка не найдена")
+
+        logger.info(f"User {request.user.email} downloaded manual")
+        # FileResponse отдает файл через wsgi.file_wrapper (sendfile на
+        # стороне сервера) и сам выставляет Content-Length и имя файла
+        return FileResponse(
+            manual_file,
+            as_attachment=True,
+            filename=os.path.basename(file_path),
+            content_type='application/pdf'
+        )
     
 @login_required
 def submit_results(request):
-    data = json.loads(request.body)
+    data = _parse_json_body(request)
     experiment = Experiments.objects.get(id=data['experiment_id'])
     
     # Расчет эталонного значения
@@ -463,7 +704,7 @@ def submit_results(request):
     experiment.error_percent = error
     experiment.save()
     
-    return JsonResponse({
+    return _json_response({
         'status': 'success' if error <= 5 else 'fail',
         'system_gamma': system_gamma,
         'error': error
@@ -474,10 +715,7 @@ def submit_results(request):
 def save_experiment_results(request, experiment_id):
     """Сохранение результатов, введенных студентом (поэтапно)."""
     try:
-        experiment = get_object_or_404(Experiments, id=experiment_id, user=request.user)
-        # results_entry, created = Results.objects.get_or_create(experiment=experiment) # Results будет обновлен позже
-
-        data = json.loads(request.body)
+        data = _parse_json_body(request)
         logger.info(f"Experiment {experiment_id}: Сохранение результатов студента. Полученные данные: {data}")
 
         # Ожидаем данные для каждого этапа
@@ -488,139 +726,125 @@ def save_experiment_results(request, experiment_id):
         # 'student_speed_stage3': 339, 'student_gamma_stage3': 1.39
         # }
 
-        all_stages_successful = True
-        per_stage_student_data = []
-
-        for i in range(1, 4): # Для трех этапов
-            student_speed_str = data.get(f'student_speed_stage{i}')
-            student_gamma_str = data.get(f'student_gamma_stage{i}')
-
-            if student_speed_str is None or student_gamma_str is None:
-                logger.error(f"Experiment {experiment_id}, этап {i}: отсутствуют поля student_speed_stage{i} или student_gamma_stage{i}")
-                return JsonResponse({
-                    'status': 'error',
-                    'message': f'Отсутствуют обязательные поля для этапа {i}: скорость и гамма'
-                }, status=400)
-            
-            try:
-                student_speed = float(student_speed_str)
-                student_gamma = float(student_gamma_str)
-            except ValueError:
-                logger.error(f"Experiment {experiment_id}, этап {i}: скорость или гамма не являются числами.")
-                return JsonResponse({
-                    'status': 'error',
-                    'message': f'Скорость и гамма для этапа {i} должны быть числами.'
-                }, status=400)
-
-            # Сохраняем студенческие значения в модель Experiments
-            setattr(experiment, f'student_speed_stage{i}', student_speed)
-            setattr(experiment, f'student_gamma_stage{i}', student_gamma)
-            
-            per_stage_student_data.append({
-                'stage': i,
-                'speed': student_speed,
-                'gamma': student_gamma
-            })
-
-            # Получаем системные значения для этого этапа
-            system_speed = getattr(experiment, f'system_speed_stage{i}', None)
-            system_gamma = getattr(experiment, f'system_gamma_stage{i}', None)
-
-            error_percent_s = None
-            error_percent_g = None
-            stage_successful = True # Флаг успеха для текущего этапа
-
-            if system_speed is not None and system_speed != 0:
-                error_percent_s = round(abs((student_speed - system_speed) / system_speed) * 100, 2)
-                setattr(experiment, f'error_percent_speed_stage{i}', error_percent_s)
-                if error_percent_s > config.ACCEPTABLE_ERROR_PERCENT:
-                    stage_successful = False
-            else:
-                logger.warning(f"Experiment {experiment.id}, этап {i}: системная скорость = {system_speed}. Невозможно рассчитать ошибку скорости.")
-                setattr(experiment, f'error_percent_speed_stage{i}', None)
-                stage_successful = False 
-
-            if system_gamma is not None and system_gamma != 0:
-                error_percent_g = round(abs((student_gamma - system_gamma) / system_gamma) * 100, 2)
-                setattr(experiment, f'error_percent_gamma_stage{i}', error_percent_g)
-                if error_percent_g > config.ACCEPTABLE_ERROR_PERCENT:
-                    stage_successful = False
-            else:
-                logger.warning(f"Experiment {experiment.id}, этап {i}: системная гамма = {system_gamma}. Невозможно рассчитать ошибку гаммы.")
-                setattr(experiment, f'error_percent_gamma_stage{i}', None)
-                stage_successful = False
-            
-            if not stage_successful:
-                all_stages_successful = False
-        
-        # Обработка student_final_gamma
-        student_final_gamma_str = data.get('student_final_gamma')
-        if student_final_gamma_str is None:
-            logger.error(f"Experiment {experiment_id}: отсутствует поле student_final_gamma")
+        # Весь запрос проверяется до изменения эксперимента: при ошибке
+        # ни одно поле модели не меняется
+        missing_fields = [field for field in STUDENT_RESULT_FIELDS if data.get(field) is None]
+        if missing_fields:
+            logger.error(f"Experiment {experiment_id}: отсутствуют поля {missing_fields}")
             return JsonResponse({
                 'status': 'error',
-                'message': 'Отсутствует обязательное поле: Финальная гамма (средняя по этапам)'
+                'message': f"Отсутствуют обязательные поля: {', '.join(missing_fields)}"
             }, status=400)
         try:
-            student_final_gamma = float(student_final_gamma_str)
-            experiment.student_final_gamma = student_final_gamma
-        except ValueError:
-            logger.error(f"Experiment {experiment_id}: финальная гамма не является числом.")
+            student_values_by_field = {
+                field: float(data[field]) for field in STUDENT_RESULT_FIELDS
+            }
+        except (TypeError, ValueError):
+            logger.error(f"Experiment {experiment_id}: скорость или гамма не являются числами.")
             return JsonResponse({
                 'status': 'error',
-                'message': 'Финальная гамма должна быть числом.'
+                'message': 'Скорости и гаммы этапов и финальная гамма должны быть числами.'
             }, status=400)
 
-        # Расчет system_final_gamma
-        system_gammas_for_avg = []
-        if experiment.system_gamma_stage1 is not None: system_gammas_for_avg.append(experiment.system_gamma_stage1)
-        if experiment.system_gamma_stage2 is not None: system_gammas_for_avg.append(experiment.system_gamma_stage2)
-        if experiment.system_gamma_stage3 is not None: system_gammas_for_avg.append(experiment.system_gamma_stage3)
-        
-        system_final_gamma = None
-        if system_gammas_for_avg:
-            system_final_gamma = round(sum(system_gammas_for_avg) / len(system_gammas_for_avg), 3)
-            experiment.system_final_gamma = system_final_gamma
-        else:
-            logger.warning(f"Experiment {experiment.id}: нет системных поэтапных гамм для расчета system_final_gamma.")
-            experiment.system_final_gamma = None
-
-        # Расчет error_percent_final_gamma
-        error_percent_final_gamma = None
-        final_gamma_successful = True # Флаг успеха для финальной гаммы
-        if system_final_gamma is not None and system_final_gamma != 0:
-            error_percent_final_gamma = round(abs((student_final_gamma - system_final_gamma) / system_final_gamma) * 100, 2)
-            experiment.error_percent_final_gamma = error_percent_final_gamma
-            if error_percent_final_gamma > config.ACCEPTABLE_ERROR_PERCENT:
-                final_gamma_successful = False
-        else:
-            logger.warning(f"Experiment {experiment.id}: системная финальная гамма = {system_final_gamma}. Невозможно рассчитать ошибку финальной гаммы.")
-            experiment.error_percent_final_gamma = None
-            final_gamma_successful = False # Считаем неуспешным, если нет системных данных для сравнения
+        per_stage_student_data = [
+            {
+                'stage': i,
+                'speed': student_values_by_field[f'student_speed_stage{i}'],
+                'gamma': student_values_by_field[f'student_gamma_stage{i}']
+            }
+            for i in range(1, 4)
+        ]
+
+        # Чтение, расчет и запись - в одной транзакции под блокировкой строки:
+        # одновременные отправки студента выполняются по очереди, и ни одна
+        # не сохраняет поля поверх чужих. of=('self',) - LEFT JOIN лаборанта
+        # из менеджера нельзя блокировать FOR UPDATE
+        with transaction.atomic():
+            experiment = Experiments.objects.select_for_update(of=('self',)).get(
+                id=experiment_id, user=request.user
+            )
 
-        experiment.save() # Сохраняем все обновленные поля эксперимента
+            # Отклонения по всем этапам считаются одним выражением над массивами:
+            # строки - скорость и гамма, столбцы - этапы. Отсутствующее или нулевое
+            # системное значение дает NaN, и этап считается неуспешным
+            student_values = np.array([
+                [stage['speed'] for stage in per_stage_student_data],
+                [stage['gamma'] for stage in per_stage_student_data]
+            ])
+            system_values = np.array([
+                experiment.stage_values('system_speed'),
+                experiment.stage_values('system_gamma')
+            ], dtype=np.float64)  # None -> NaN
+            system_values[system_values == 0] = np.nan
+            error_values = np.round(
+                np.abs((student_values - system_values) / system_values) * 100, 2
+            )
+            # NaN не проходит сравнение, поэтому этап без системных данных неуспешен
+            all_stages_successful = bool(
+                (error_values <= config.ACCEPTABLE_ERROR_PERCENT).all()
+            )
 
-        # Обновляем статус в Results и Experiments
-        results_entry, created = Results.objects.get_or_create(experiment=experiment)
-        # Итоговый успех, если ВСЕ этапы успешны И финальная гамма успешна
-        final_overall_status_value = 'success' if all_stages_successful and final_gamma_successful else 'fail'
+            changed_fields = []
+            for quantity, student_row, error_row in zip(
+                ('speed', 'gamma'), student_values.tolist(), error_values.tolist()
+            ):
+                errors = [None if math.isnan(error) else error for error in error_row]
+                for i, error in zip(STAGE_NUMBERS, errors):
+                    if error is None:
+                        logger.warning(f"Experiment {experiment.id}, этап {i}: системное значение {quantity} не задано или равно 0. Невозможно рассчитать ошибку.")
+                changed_fields += experiment.set_stage_values(f'student_{quantity}', student_row)
+                changed_fields += experiment.set_stage_values(f'error_percent_{quantity}', errors)
         
-        # Если успех — фиксируем success, если нет — оставляем возможность повторного ввода
-        if final_overall_status_value == 'success':
-            results_entry.status = 'success'
-        else:
-            results_entry.status = 'pending_student_input'
-        # Очистим старые поля усредненных значений в Results
-        results_entry.student_speed = None 
-        results_entry.student_gamma = None
-        results_entry.gamma_calculated = None 
-        results_entry.speed_of_sound_calculated = None 
-        results_entry.error_percent_gamma = None 
-        results_entry.error_percent_speed = None 
-        results_entry.save()
+            student_final_gamma = student_values_by_field['student_final_gamma']
+            experiment.student_final_gamma = student_final_gamma
 
-        experiment.status = 'completed' if final_overall_status_value == 'success' else 'failed'
-        experiment.save()
+            # Расчет system_final_gamma
+            system_gammas_for_avg = [
+                gamma for gamma in experiment.stage_values('system_gamma') if gamma is not None
+            ]
+        
+            system_final_gamma = None
+            if system_gammas_for_avg:
+                system_final_gamma = round(sum(system_gammas_for_avg) / len(system_gammas_for_avg), 3)
+                experiment.system_final_gamma = system_final_gamma
+            else:
+                logger.warning(f"Experiment {experiment.id}: нет системных поэтапных гамм для расчета system_final_gamma.")
+                experiment.system_final_gamma = None
+
+            # Расчет error_percent_final_gamma
+            error_percent_final_gamma = None
+            final_gamma_successful = True # Флаг успеха для финальной гаммы
+            if system_final_gamma is not None and system_final_gamma != 0:
+                error_percent_final_gamma = round(abs((student_final_gamma - system_final_gamma) / system_final_gamma) * 100, 2)
+                experiment.error_percent_final_gamma = error_percent_final_gamma
+                if error_percent_final_gamma > config.ACCEPTABLE_ERROR_PERCENT:
+                    final_gamma_successful = False
+            else:
+                logger.warning(f"Experiment {experiment.id}: системная финальная гамма = {system_final_gamma}. Невозможно рассчитать ошибку финальной гаммы.")
+                experiment.error_percent_final_gamma = None
+                final_gamma_successful = False # Считаем неуспешным, если нет системных данных для сравнения
+
+            # Итоговый успех, если ВСЕ этапы успешны И финальная гамма успешна
+            final_overall_status_value = 'success' if all_stages_successful and final_gamma_successful else 'fail'
+            experiment.status = 'completed' if final_overall_status_value == 'success' else 'failed'
+
+            # Обновляются только вычисленные здесь поля - одним UPDATE
+            changed_fields += [
+                'student_final_gamma',
+                'system_final_gamma',
+                'error_percent_final_gamma',
+                'status',
+                'updated_at'
+            ]
+
+            experiment.save(update_fields=changed_fields)
+            # Если успех — фиксируем success, если нет — оставляем возможность повторного ввода
+            Results.objects.update_or_create(
+                experiment=experiment,
+                defaults={
+                    'status': 'success' if final_overall_status_value == 'success' else 'pending_student_input'
+                }
+            )
 
         logger.info(f"Результаты для эксперимента {experiment_id} сохранены. Итоговый статус: {final_overall_status_value}. Поэтапные: {per_stage_student_data}. Финальная гамма студ: {student_final_gamma}, сист: {system_final_gamma}, ошибка: {error_percent_final_gamma}")
 
@@ -636,18 +860,26 @@ def save_experiment_results(request, experiment_id):
                 'error_percent_final_gamma': error_percent_final_gamma
             }
         }
-        for i in range(1, 4):
+        for i, student_speed, student_gamma, system_speed, system_gamma, error_percent_speed, error_percent_gamma in zip(
+            STAGE_NUMBERS,
+            experiment.stage_values('student_speed'),
+            experiment.stage_values('student_gamma'),
+            experiment.stage_values('system_speed'),
+            experiment.stage_values('system_gamma'),
+            experiment.stage_values('error_percent_speed'),
+            experiment.stage_values('error_percent_gamma')
+        ):
             response_payload['stages'].append({
                 'stage_number': i,
-                'student_speed': getattr(experiment, f'student_speed_stage{i}'),
-                'student_gamma': getattr(experiment, f'student_gamma_stage{i}'),
-                'system_speed': getattr(experiment, f'system_speed_stage{i}'),
-                'system_gamma': getattr(experiment, f'system_gamma_stage{i}'),
-                'error_percent_speed': getattr(experiment, f'error_percent_speed_stage{i}'),
-                'error_percent_gamma': getattr(experiment, f'error_percent_gamma_stage{i}'),
+                'student_speed': student_speed,
+                'student_gamma': student_gamma,
+                'system_speed': system_speed,
+                'system_gamma': system_gamma,
+                'error_percent_speed': error_percent_speed,
+                'error_percent_gamma': error_percent_gamma,
             })
         
-        return JsonResponse(response_payload)
+        return _json_response(response_payload)
     
     except Experiments.DoesNotExist:
         logger.error(f"Experiment {experiment_id} не найден при попытке сохранения результатов студента.")
@@ -668,126 +900,97 @@ def download_protocol(request, experiment_id):
     if not (request.user.is_staff or request.user == student):
         return HttpResponseForbidden()
     
-    # Генерация PDF
-    pdf_content = generate_protocol_pdf(experiment, student)
-    
-    # Возвращаем PDF как ответ
-    response = HttpResponse(pdf_content, content_type='application/pdf')
+    # PDF рисуется прямо в ответ, без промежуточного буфера
+    response = HttpResponse(content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="protocol_{experiment_id}.pdf"'
+    generate_protocol_pdf(
+        experiment,
+        {'full_name': student.full_name, 'group_name': student.group_name},
+        response
+    )
     return response
 
-def generate_protocol_pdf(experiment, student_data):
-    """Генерация PDF протокола с использованием ReportLab"""
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    
-    # Регистрируем шрифт с поддержкой кириллицы
-    font_path = os.path.join(settings.BASE_DIR, 'static', 'fonts', 'DejaVuSans-Bold.ttf')
-    pdfmetrics.registerFont(TTFont('DejaVu', font_path))
-    
-    # Настройки документа
-    width, height = A4
+def generate_protocol_pdf(experiment, student_data, output=None):
+    """
+    Генерация PDF протокола с использованием ReportLab.
+
+    Args:
+        experiment: Эксперимент
+        student_data: Словарь с full_name и group_name студента
+        output: Файлоподобный объект для записи PDF (например, HttpResponse);
+            если не задан, PDF возвращается в виде bytes
+
+    Returns:
+        bytes | None: Содержимое PDF, если output не задан
+    """
+    buffer = BytesIO() if output is None else None
     margin = 2 * cm
-    line_height = 0.5 * cm
-    
-    # 1. Заголовок документа
-    p.setFont("DejaVu", 16)
-    p.drawString(margin, height - margin, f"Протокол эксперимента #{experiment.id}")
-    
-    # 2. Информация о студенте
-    p.setFont("DejaVu", 12)
-    y_position = height - margin - line_height * 2
-    p.drawString(margin, y_position, f"Студент: {student_data['full_name']}")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Группа: {student_data['group_name']}")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Дата: {experiment.created_at.strftime('%d.%m.%Y %H:%M')}")
-    
-    # 3. Этап 1
-    y_position -= line_height * 1.5
-    p.setFont("DejaVu", 14)
-    p.drawString(margin, y_position, "Этап 1:")
-    
-    p.setFont("DejaVu", 12)
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Введенная скорость звука: {experiment.student_speed_stage1 or '-'} м/с")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Введенное значение γ: {experiment.student_gamma_stage1 or '-'}")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Рассчитанная скорость звука: {experiment.system_speed_stage1 or '-'} м/с")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Рассчитанное значение γ: {experiment.system_gamma_stage1 or '-'}")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Отклонения: Скорость: {experiment.error_percent_speed_stage1 or '-'}%, γ: {experiment.error_percent_gamma_stage1 or '-'}%")
-    
-    # 4. Этап 2
-    y_position -= line_height * 1.5
-    p.setFont("DejaVu", 14)
-    p.drawString(margin, y_position, "Этап 2:")
-    
-    p.setFont("DejaVu", 12)
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Введенная скорость звука: {experiment.student_speed_stage2 or '-'} м/с")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Введенное значение γ: {experiment.student_gamma_stage2 or '-'}")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Рассчитанная скорость звука: {experiment.system_speed_stage2 or '-'} м/с")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Рассчитанное значение γ: {experiment.system_gamma_stage2 or '-'}")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Отклонения: Скорость: {experiment.error_percent_speed_stage2 or '-'}%, γ: {experiment.error_percent_gamma_stage2 or '-'}%")
-    
-    # 5. Этап 3
-    y_position -= line_height * 1.5
-    p.setFont("DejaVu", 14)
-    p.drawString(margin, y_position, "Этап 3:")
-    
-    p.setFont("DejaVu", 12)
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Введенная скорость звука: {experiment.student_speed_stage3 or '-'} м/с")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Введенное значение γ: {experiment.student_gamma_stage3 or '-'}")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Рассчитанная скорость звука: {experiment.system_speed_stage3 or '-'} м/с")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Рассчитанное значение γ: {experiment.system_gamma_stage3 or '-'}")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Отклонения: Скорость: {experiment.error_percent_speed_stage3 or '-'}%, γ: {experiment.error_percent_gamma_stage3 or '-'}%")
-    
-    # 6. Финальные результаты
-    y_position -= line_height * 1.5
-    p.setFont("DejaVu", 14)
-    p.drawString(margin, y_position, "Финальные результаты:")
-    
-    p.setFont("DejaVu", 12)
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Финальное значение γ (студент): {experiment.student_final_gamma or '-'}")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Финальное значение γ (система): {experiment.system_final_gamma or '-'}")
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Финальное отклонение по γ: {experiment.error_percent_final_gamma or '-'}%")
-    
-    # 7. Итоговый результат
-    y_position -= line_height * 1.5
-    p.setFont("DejaVu", 14)
-    p.drawString(margin, y_position, "Итоговый результат эксперимента:")
-    
-    p.setFont("DejaVu", 12)
-    y_position -= line_height
-    p.drawString(margin, y_position, f"Статус: {experiment.status}")
-    
-    # 8. Подпись и дата
-    y_position -= line_height * 2
-    p.line(margin, y_position, width - margin, y_position)
-    y_position -= line_height
-    p.drawString(margin, y_position, "Преподаватель: ___________________")
-    y_position -= line_height
-    p.drawString(margin, y_position, "Дата: ___________________")
-    
-    # Сохраняем PDF
-    p.showPage()
-    p.save()
-    
+    doc = SimpleDocTemplate(
+        buffer if output is None else output,
+        pagesize=A4,
+        leftMargin=margin,
+        rightMargin=margin,
+        topMargin=margin,
+        bottomMargin=margin,
+        title=f"Протокол эксперимента #{experiment.id}"
+    )
+
+    # Шрифт с поддержкой кириллицы регистрируется при импорте модуля
+    _register_protocol_font()
+
+    heading = PROTOCOL_STYLES['heading']
+    body = PROTOCOL_STYLES['body']
+
+    def value(field_value) -> str:
+        return '-' if field_value is None else str(field_value)
+
+    # 1-2. Заголовок и информация о студенте
+    story = [
+        Paragraph(f"Протокол эксперимента #{experiment.id}", PROTOCOL_STYLES['title']),
+        Paragraph(f"Студент: {escape(student_data['full_name'])}", body),
+        # group_name у пользователя может быть NULL
+        Paragraph(f"Группа: {escape(student_data['group_name'] or 'Не указана')}", body),
+        Paragraph(f"Дата: {experiment.created_at.strftime('%d.%m.%Y %H:%M')}", body),
+    ]
+
+    # 3. Этапы - одна таблица: строки - величины, столбцы - этапы
+    stage_rows = [['', *(f"Этап {stage_number}" for stage_number in STAGE_NUMBERS)]]
+    stage_rows += [
+        [label, *(value(v) for v in experiment.stage_values(name))]
+        for label, name in PROTOCOL_STAGE_ROWS
+    ]
+    story += [
+        Paragraph("Результаты по этапам:", heading),
+        Table(stage_rows, style=PROTOCOL_TABLE_STYLE, hAlign='LEFT'),
+    ]
+
+    # 4. Финальные результаты
+    story += [
+        Paragraph("Финальные результаты:", heading),
+        Paragraph(f"Финальное значение γ (студент): {value(experiment.student_final_gamma)}", body),
+        Paragraph(f"Финальное значение γ (система): {value(experiment.system_final_gamma)}", body),
+        Paragraph(f"Финальное отклонение по γ: {value(experiment.error_percent_final_gamma)}%", body),
+    ]
+
+    # 5. Итоговый результат
+    story += [
+        Paragraph("Итоговый результат эксперимента:", heading),
+        Paragraph(f"Статус: {experiment.status}", body),
+    ]
+
+    # 6. Подпись и дата
+    story += [
+        Spacer(1, margin / 2),
+        HRFlowable(width='100%', thickness=1, color=colors.black, spaceAfter=0.5 * cm),
+        Paragraph("Преподаватель: ___________________", body),
+        Paragraph("Дата: ___________________", body),
+    ]
+
+    doc.build(story)
+
+    if buffer is None:
+        return None
+
     # Получаем содержимое PDF
     pdf = buffer.getvalue()
     buffer.close()
@@ -823,12 +1026,15 @@ def assistant_dashboard(request):
     logger.info(f"Assistant {request.user.id} accessed dashboard")
     
     # Получаем активные эксперименты для текущего лаборанта
-    active_experiments = Experiments.objects.filter(
+    # Список вычисляется один раз: длина для лога берется без COUNT(*)
+    active_experiments = list(Experiments.objects.filter(
         assistant=request.user,
-        status__in=['preparing', 'stage_1', 'stage_2', 'stage_3']
-    ).select_related('user')
+        status__in=STAGE_STATUSES
+    ).select_related('user').only(
+        'id', 'status', 'user__full_name', 'assistant__full_name'
+    ))
     
-    logger.info(f"Found {active_experiments.count()} experiments")
+    logger.info(f"Found {len(active_experiments)} experiments")
     
     return render(request, 'home.html', {
         'active_experiments': active_experiments,
@@ -840,26 +1046,38 @@ def assistant_dashboard(request):
 def assistant_start_experiment(request):
     """Создание эксперимента с начальными параметрами"""
     logger.info(f"Start experiment request from {request.user}")
-    print(f"DEBUG: Start experiment request from {request.user}")
 
-    try:
-        if request.user.role != 'assistant':
-            logger.warning(f"User {request.user} is not an assistant")
-            return JsonResponse({'status': 'error', 'message': 'Только для лаборантов'}, status=403)
+    if request.user.role != 'assistant':
+        logger.warning(f"User {request.user} is not an assistant")
+        return JsonResponse({'status': 'error', 'message': 'Только для лаборантов'}, status=403)
 
+    try:
         data = json.loads(request.body)
         student_id = data.get('student_id')
+        if student_id:
+            student_id = int(student_id)
         temperature = float(data.get('temperature', 20.0))
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.error(f"Invalid start experiment payload: {str(e)}")
+        return JsonResponse({'status': 'error', 'message': 'Некорректные данные запроса'}, status=400)
+
+    logger.info(f"Creating experiment for student {student_id}")
+
+    if not student_id:
+        logger.error("No student_id provided")
+        return JsonResponse({'status': 'error', 'message': 'Не указан студент'}, status=400)
+
+    # Из записи студента нужны только id (для FK) и ФИО для ответа;
+    # отсутствие студента - обычный ответ 404, а не исключение
+    student = User.objects.filter(
+        id=student_id,
+        role='student'
+    ).only('id', 'full_name').first()
+    if student is None:
+        logger.error(f"Student {student_id} not found")
+        return JsonResponse({'status': 'error', 'message': 'Студент не найден'}, status=404)
 
-        logger.info(f"Creating experiment for student {student_id}")
-        print(f"DEBUG: Creating experiment for student {student_id}")
-
-        if not student_id:
-            logger.error("No student_id provided")
-            return JsonResponse({'status': 'error', 'message': 'Не указан студент'}, status=400)
-
-        student = get_object_or_404(User, id=student_id, role='student')
-
+    try:
         experiment = Experiments.objects.create(
             user=student,
             assistant=request.user,
@@ -867,41 +1085,18 @@ def assistant_start_experiment(request):
             status='preparing',
             stages=[{"frequency": None, "data": []} for _ in range(3)]
         )
-
-        logger.info(f"Experiment {experiment.id} created successfully")
-        print(f"DEBUG: Experiment {experiment.id} created")
-
-        return JsonResponse({
-            'status': 'success',
-            'experiment_id': experiment.id,
-            'student_name': student.full_name,
-            'temperature': temperature
-        })
-    except Exception as e:
-        logger.error(f"Error creating experiment: {str(e)}")
-        print(f"ERROR: {str(e)}")
+    except DatabaseError as e:
+        logger.exception(f"Error creating experiment: {str(e)}")
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
-@login_required
-def upload_experiment_data(request, experiment_id):
-    experiment = get_object_or_404(Experiments, id=experiment_id)
-    
-    if request.user != experiment.assistant:
-        return JsonResponse({'status': 'error', 'message': 'Доступ запрещен'}, status=403)
-    
-    try:
-        data = json.loads(request.body)
-        EquipmentData.objects.create(
-            experiment=experiment,
-            time_ms=data['time_ms'],
-            microphone_signal=data['microphone_signal'],
-            tube_position=data['tube_position'],
-            voltage=data['voltage']
-        )
-        return JsonResponse({'status': 'success'})
-    except Exception as e:
-        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
-    
+    logger.info(f"Experiment {experiment.id} created successfully")
+
+    return JsonResponse({
+        'status': 'success',
+        'experiment_id': experiment.id,
+        'student_name': student.full_name,
+        'temperature': temperature
+    })
 
 class AssistantLoginView(View):
     template_name = 'auth/assistant_login.html'
@@ -934,45 +1129,17 @@ def get_student_experiments(request):
         return JsonResponse({'status': 'error', 'message': 'Доступ запрещен'}, status=403)
     
     try:
-        # Запрашиваем эксперименты и связанные с ними результаты
-        experiments_with_results = Experiments.objects.filter(
-            user=request.user  # ИСПРАВЛЕНО ЗДЕСЬ
-        ).select_related('assistant', 'results').order_by('-created_at')
-        
-        logger.info(f"Found {experiments_with_results.count()} experiments for student {request.user.email} before processing statuses.")
-
-        experiments_data = []
-        for exp in experiments_with_results:
-            student_facing_status = 'Неизвестно'
-            results_status = exp.results.status if hasattr(exp, 'results') and exp.results else None
-            exp_status_from_model = exp.status
-
-            if results_status: # Если есть статус в Results
-                if results_status == 'pending_student_input':
-                    student_facing_status = 'в процессе выполнения'
-                elif results_status == 'success' or results_status == 'final_completed':
-                    student_facing_status = 'Завершен'
-                elif results_status == 'fail':
-                    student_facing_status = exp.results.get_status_display() # Должно быть 'Провальный'
-                else: # Другие возможные статусы Results (например, completed_by_assistant)
-                    student_facing_status = exp.results.get_status_display()
-            elif exp_status_from_model == 'failed': # Обработка статуса Experiments.failed
-                student_facing_status = exp.get_status_display() # Должно вернуть "Провальный"
-            elif exp_status_from_model == 'completed':
-                # Эксперимент завершен лаборантом, но студент еще не вводил данные, или Results еще не созданы/обновлены
-                student_facing_status = 'Ожидает ваших результатов'
-            else:
-                # Статус из модели Experiment, если нет данных в Results и не 'failed'/'completed'
-                student_facing_status = exp.get_status_display()
-
-            experiments_data.append({
-                'id': exp.id,
-                'created_at': exp.created_at.strftime('%Y-%m-%d %H:%M:%S') if exp.created_at else None,
-                'status_for_student': student_facing_status,
-                'raw_experiment_status': exp.status,
-                'results_status': results_status,
-                'assistant_name': exp.assistant.full_name if exp.assistant else 'Нет данных'
-            })
+        experiments_data = [
+            {
+                'id': row['id'],
+                'created_at': row['created_at'].strftime('%Y-%m-%d %H:%M:%S') if row['created_at'] else None,
+                'status_for_student': row['status_for_student'],
+                'raw_experiment_status': row['raw_experiment_status'],
+                'results_status': row['results_status'],
+                'assistant_name': row['assistant_name']
+            }
+            for row in _build_student_experiments(request.user)
+        ]
         
         logger.info(f"Returning {len(experiments_data)} experiments for student {request.user.email}. Data: {experiments_data}")
         return JsonResponse({'experiments': experiments_data, 'status': 'success'})
@@ -1034,16 +1201,37 @@ def upload_experiment_data(request, experiment_id):
         if current_stage >= len(experiment.stages):
             return JsonResponse({'status': 'error', 'message': 'Неверный номер этапа'}, status=400)
 
-        # Добавляем данные в текущий этап
-        experiment.stages[current_stage]['data'].append({
-            'time_ms': data['time_ms'],
-            'microphone_signal': data['microphone_signal'],
-            'tube_position': data['tube_position'],
-            'voltage': data['voltage']
-        })
-        experiment.save()
+        # Пакет отсчетов ('samples') или один отсчет в полях запроса
+        samples = [
+            {
+                'time_ms': sample['time_ms'],
+                'microphone_signal': sample['microphone_signal'],
+                'tube_position': sample['tube_position'],
+                'voltage': sample['voltage']
+            }
+            for sample in data.get('samples', [data])
+        ]
+
+        with transaction.atomic():
+            # Отсчеты записываются в EquipmentData пакетами COPY, без
+            # объекта модели и INSERT на каждую строку
+            count = EquipmentData.bulk_insert(
+                experiment.id,
+                (
+                    (
+                        sample['time_ms'],
+                        sample['microphone_signal'],
+                        sample['tube_position'],
+                        sample['voltage']
+                    )
+                    for sample in samples
+                )
+            )
+            # Добавляем данные в текущий этап - одно сохранение на весь пакет
+            experiment.stages[current_stage]['data'].extend(samples)
+            experiment.save(update_fields=['stages', 'updated_at'])
 
-        return JsonResponse({'status': 'success'})
+        return JsonResponse({'status': 'success', 'count': count})
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
@@ -1051,7 +1239,7 @@ def upload_experiment_data(request, experiment_id):
 def experiment_control_view(request, experiment_id):
     """Контрольная панель эксперимента для лаборанта"""
     experiment = get_object_or_404(Experiments, id=experiment_id)
-    print(f"DEBUG: Opening experiment {experiment_id}")
+    logger.debug(f"Opening experiment {experiment_id}")
     
     if request.user != experiment.assistant:
         raise PermissionDenied
@@ -1121,10 +1309,9 @@ def complete_experiment(request, experiment_id):
         # Сохраняем итоговые данные графиков
         if 'charts_data' in data:
             experiment.visualization_data = data['charts_data']
-        
-        experiment.save()
 
-        # Расчет системных значений ПОЭТАПНО
+        # Расчет системных значений ПОЭТАПНО (по этапам в памяти - отдельное
+        # сохранение эксперимента до расчета не нужно)
         # system_avg_speed, system_avg_gamma = calculate_system_results(experiment.stages, experiment.temperature) # Старый вызов
         system_stage_results = calculate_system_results(experiment.stages, experiment.temperature) # Новый вызов, возвращает список словарей
         logger.info(f"Experiment {experiment_id}: Calculated system_stage_results={system_stage_results}")
@@ -1140,22 +1327,31 @@ def complete_experiment(request, experiment_id):
             experiment.system_speed_stage3 = system_stage_results[2].get('speed') if len(system_stage_results) > 2 else None
             experiment.system_gamma_stage3 = system_stage_results[2].get('gamma') if len(system_stage_results) > 2 else None
         
-        experiment.save() # Сохраняем обновленный experiment с поэтапными системными данными
-
-        # Создание или обновление записи в Results
-        # Поля gamma_calculated и speed_of_sound_calculated в Results теперь могут быть не нужны
-        # или использоваться для каких-то общих/справочных значений, если это требуется.
-        # На данном этапе я их закомментирую, предполагая, что основные данные теперь в Experiments.
-        Results.objects.update_or_create(
-            experiment=experiment,
-            defaults={
-                'visualization_data': data.get('charts_data', {}),
-                'detailed_results': data.get('steps', []), # Это поле кажется важным, оставляем
-                'status': 'pending_student_input', 
-                # 'gamma_calculated': system_avg_gamma, # Устарело, данные теперь в Experiments
-                # 'speed_of_sound_calculated': system_avg_speed # Устарело, данные теперь в Experiments
-            }
-        )
+        # Массивы отсчетов этапов уже сохранены в experiment.stages -
+        # в результатах оставляются только сводные поля шагов
+        detailed_results = [
+            {k: v for k, v in step_data.items() if k not in ('data', 'labels')}
+            for step_data in data.get('steps', [])
+        ]
+
+        # Эксперимент и результаты записываются одной транзакцией
+        with transaction.atomic():
+            experiment.save() # Сохраняем обновленный experiment с поэтапными системными данными
+
+            # Создание или обновление записи в Results
+            # Поля gamma_calculated и speed_of_sound_calculated в Results теперь могут быть не нужны
+            # или использоваться для каких-то общих/справочных значений, если это требуется.
+            # На данном этапе я их закомментирую, предполагая, что основные данные теперь в Experiments.
+            Results.objects.update_or_create(
+                experiment=experiment,
+                defaults={
+                    'visualization_data': data.get('charts_data', {}),
+                    'detailed_results': detailed_results,
+                    'status': 'pending_student_input', 
+                    # 'gamma_calculated': system_avg_gamma, # Устарело, данные теперь в Experiments
+                    # 'speed_of_sound_calculated': system_avg_speed # Устарело, данные теперь в Experiments
+                }
+            )
 
         return JsonResponse({'status': 'success'})
 
@@ -1192,30 +1388,31 @@ def get_experiment_details_for_student(request, experiment_id):
                     
                     logger.info(f"[Exp {experiment.id}, Stage {stage_index+1}] Data for graph: {len(graph_distances_cm)} distances, {len(graph_amplitudes)} amplitudes.")
 
-                    temp_full_signal_data = [] # Временный список для накопления всех точек
                     if isinstance(graph_distances_cm, list) and isinstance(graph_amplitudes, list) and len(graph_distances_cm) == len(graph_amplitudes):
-                        for i in range(len(graph_distances_cm)):
-                            try:
-                                pos_m = float(graph_distances_cm[i]) / 100.0 
-                                amp = float(graph_amplitudes[i])
-                                if not (np.isnan(pos_m) or np.isnan(amp)):
-                                    temp_full_signal_data.append({'position': pos_m, 'amplitude': amp})
-                            except (ValueError, TypeError) as e:
-                                logger.warning(f"[Exp {experiment.id}, Stage {stage_index+1}] Error converting graph data point: dist={graph_distances_cm[i]}, amp={graph_amplitudes[i]}. Error: {e}")
-                        
-                        # Логика прореживания данных
-                        MAX_POINTS_FULL_SIGNAL = 2000
-                        TARGET_POINTS_AFTER_DECIMATION = 1000 # Целевое количество точек после прореживания
-                        
-                        if len(temp_full_signal_data) > MAX_POINTS_FULL_SIGNAL:
+                        # Преобразование, фильтр NaN и прореживание - операции над
+                        # массивами; словари создаются только для оставшихся точек
+                        try:
+                            positions = np.asarray(graph_distances_cm, dtype=np.float64) / 100.0
+                            amplitudes = np.asarray(graph_amplitudes, dtype=np.float64)
+                        except (ValueError, TypeError) as e:
+                            logger.warning(f"[Exp {experiment.id}, Stage {stage_index+1}] Error converting graph data: {e}")
+                            positions = amplitudes = np.empty(0)
+
+                        valid = ~(np.isnan(positions) | np.isnan(amplitudes))
+                        positions = positions[valid]
+                        amplitudes = amplitudes[valid]
+
+                        if len(positions) > MAX_POINTS_FULL_SIGNAL:
                             # Рассчитываем шаг так, чтобы получить примерно TARGET_POINTS_AFTER_DECIMATION точек
-                            step = round(len(temp_full_signal_data) / TARGET_POINTS_AFTER_DECIMATION)
-                            if step <= 0: step = 1 # Шаг не может быть 0 или отрицательным
-                            
-                            full_signal_data_for_stage = temp_full_signal_data[::step]
-                            logger.info(f"[Exp {experiment.id}, Stage {stage_index+1}] Full signal data decimated from {len(temp_full_signal_data)} to {len(full_signal_data_for_stage)} points (step: {step}).")
-                        else:
-                            full_signal_data_for_stage = temp_full_signal_data
+                            step = max(1, round(len(positions) / TARGET_POINTS_AFTER_DECIMATION))
+                            logger.info(f"[Exp {experiment.id}, Stage {stage_index+1}] Full signal data decimated from {len(positions)} to {len(positions[::step])} points (step: {step}).")
+                            positions = positions[::step]
+                            amplitudes = amplitudes[::step]
+
+                        full_signal_data_for_stage = [
+                            {'position': position, 'amplitude': amplitude}
+                            for position, amplitude in zip(positions.tolist(), amplitudes.tolist())
+                        ]
 
                         # logger.info(f"[Exp {experiment.id}, Stage {stage_index+1}] Processed full_signal_data_for_stage (first 5): {full_signal_data_for_stage[:5]}") # Заменено на лог ниже
                     elif len(graph_distances_cm) != len(graph_amplitudes):
@@ -1312,19 +1509,27 @@ def get_experiment_details_for_student(request, experiment_id):
         system_calculations_per_stage = []
         student_submitted_values_per_stage = [] # Для возможного отображения ранее введенных студентом значений
 
-        for i in range(1, 4):
+        for i, system_speed, system_gamma, student_speed, student_gamma, error_speed, error_gamma in zip(
+            STAGE_NUMBERS,
+            experiment.stage_values('system_speed'),
+            experiment.stage_values('system_gamma'),
+            experiment.stage_values('student_speed'),
+            experiment.stage_values('student_gamma'),
+            experiment.stage_values('error_percent_speed'),
+            experiment.stage_values('error_percent_gamma')
+        ):
             system_calculations_per_stage.append({
                 'stage': i,
-                'speed': getattr(experiment, f'system_speed_stage{i}', None),
-                'gamma': getattr(experiment, f'system_gamma_stage{i}', None)
+                'speed': system_speed,
+                'gamma': system_gamma
             })
             # Также соберем данные, которые студент мог уже ввести для этого эксперимента
             student_submitted_values_per_stage.append({
                 'stage': i,
-                'speed': getattr(experiment, f'student_speed_stage{i}', None),
-                'gamma': getattr(experiment, f'student_gamma_stage{i}', None),
-                'error_speed': getattr(experiment, f'error_percent_speed_stage{i}', None),
-                'error_gamma': getattr(experiment, f'error_percent_gamma_stage{i}', None)
+                'speed': student_speed,
+                'gamma': student_gamma,
+                'error_speed': error_speed,
+                'error_gamma': error_gamma
             })
 
         # Принудительно отключаем отладочный режим для профиля студента (если это временная мера)
@@ -1517,14 +1722,14 @@ def protocol_detail_view(request, experiment_id):
         elif results.status == 'pending_student_input':
             protocol_status = "В процессе выполнения студентом"
         else:
-            protocol_status = results.get_status_display() # Для других статусов Results
+            protocol_status = results.status_display # Для других статусов Results
     elif experiment.status == 'failed':
         protocol_status = "Провал (завершено системой с ошибкой)"
     elif experiment.status == 'completed':
         # Эксперимент завершен лаборантом, но студент еще не предоставил данные
         protocol_status = "Ожидает ввода студента"
     else:
-        protocol_status = experiment.get_status_display()
+        protocol_status = experiment.status_display
 
 
     context = {
@@ -1590,11 +1795,9 @@ def download_protocol_pdf(request, experiment_id):
         'group_name': experiment.user.group_name
     }
     
-    # Генерируем PDF
-    pdf_content = generate_protocol_pdf(experiment, student_data)
-    
-    # Создаем HTTP ответ с PDF
-    response = HttpResponse(pdf_content, content_type='application/pdf')
+    # Создаем HTTP ответ и рисуем PDF прямо в него
+    response = HttpResponse(content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="protocol_{experiment_id}.pdf"'
+    generate_protocol_pdf(experiment, student_data, response)
     
     return response
\ No newline at end of file